@@ -0,0 +1,258 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+
+import googlemaps
+
+# Backends stand in for googlemaps.Client: they expose the same places, place,
+# geocode and places_photo methods, so data.py works with any of them unchanged.
+
+class FakePlacesBackend:
+    """In-process Places stand-in with simulated latency and error injection
+
+    Every response is generated deterministically from the query or place_id,
+    so repeated runs see the same businesses. latency and jitter are in
+    seconds per call, error_rate is the chance a call raises an ApiError with
+    one of error_statuses, and next page tokens only become valid
+    page_token_delay seconds after they are issued, as with the real API.
+    """
+
+    def __init__(self, results=60, latency=0.05, jitter=0.0, error_rate=0.0,
+                 error_statuses=('UNKNOWN_ERROR',), page_token_delay=0.0,
+                 page_size=20, seed=0):
+        self.results = results
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.page_token_delay = page_token_delay
+        self.page_size = page_size
+        self.seed = seed
+        self.calls = Counter()
+        self._page_tokens = {}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def _simulate_call(self, method):
+        """Count the call, sleep for its latency and maybe raise an injected error"""
+        with self._lock:
+            self.calls[method] += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            status = self._random.choice(self.error_statuses) if fail else None
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            raise googlemaps.exceptions.ApiError(status, f"Injected {status} for {method}")
+
+    def _rng(self, *parts):
+        """Random generator seeded from the backend seed and the given parts"""
+        key = '|'.join(str(part) for part in (self.seed,) + parts)
+        return random.Random(int(hashlib.sha256(key.encode()).hexdigest()[:16], 16))
+
+    def _place(self, query, index):
+        """Text search result for the index-th match of query"""
+        rng = self._rng('place', query, index)
+        place_id = f"fake-{hashlib.sha1(f'{query}|{index}'.encode()).hexdigest()[:20]}"
+        return {
+            'place_id': place_id,
+            'name': f"{query.title()} #{index + 1}",
+            'formatted_address': f"{rng.randint(1, 999)} {rng.choice(['Main', 'Oak', 'Pine', 'Market'])} St",
+            'rating': round(rng.uniform(2.5, 5.0), 1),
+            'user_ratings_total': rng.randint(0, 5000),
+            'geometry': {'location': {'lat': rng.uniform(-60, 60), 'lng': rng.uniform(-180, 180)}},
+            'photos': [{'photo_reference': f"photo-{place_id}", 'width': 800, 'height': 600}],
+            'business_status': 'OPERATIONAL',
+            'types': ['establishment'],
+        }
+
+    def places(self, query=None, location=None, radius=None, language=None,
+               page_token=None, **kwargs):
+        """Paged text search, 20 results per page"""
+        self._simulate_call('places')
+        if page_token:
+            with self._lock:
+                issued = self._page_tokens.get(page_token)
+            if issued is None:
+                raise googlemaps.exceptions.ApiError('INVALID_REQUEST', 'Unknown page token')
+            query, start, issued_at = issued
+            if time.monotonic() - issued_at < self.page_token_delay:
+                raise googlemaps.exceptions.ApiError('INVALID_REQUEST', 'Page token not yet valid')
+        else:
+            start = 0
+
+        query = query or ''
+        end = min(start + self.page_size, self.results)
+        response = {
+            'status': 'OK',
+            'results': [self._place(query, index) for index in range(start, end)],
+        }
+        if end < self.results:
+            token = hashlib.sha1(f"{query}|{end}|{time.monotonic()}".encode()).hexdigest()
+            with self._lock:
+                self._page_tokens[token] = (query, end, time.monotonic())
+            response['next_page_token'] = token
+        return response
+
+    def place(self, place_id, fields=None, **kwargs):
+        """Place details with up to five reviews, honoring the fields mask"""
+        self._simulate_call('place')
+        rng = self._rng('details', place_id)
+        reviews = [
+            {
+                'rating': rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 2, 4, 6])[0],
+                'text': ' '.join(rng.choice(['Great', 'service', 'slow', 'friendly', 'tasty', 'clean', 'busy'])
+                                 for _ in range(rng.randint(5, 80))),
+                'time': rng.randint(1_500_000_000, 1_700_000_000),
+            }
+            for _ in range(rng.randint(0, 5))
+        ]
+        result = {
+            'place_id': place_id,
+            'website': f"https://{place_id}.example.com",
+            'reviews': reviews,
+            'photos': [{'photo_reference': f"photo-{place_id}", 'width': 800, 'height': 600}],
+        }
+        if fields is not None:
+            keys = {'photo': 'photos', 'review': 'reviews'}
+            wanted = {keys.get(field, field) for field in fields}
+            result = {key: value for key, value in result.items() if key in wanted}
+        return {'status': 'OK', 'result': result}
+
+    def geocode(self, address=None, **kwargs):
+        """Deterministic coordinates for any address"""
+        self._simulate_call('geocode')
+        rng = self._rng('geocode', (address or '').strip().lower())
+        return [{'geometry': {'location': {'lat': rng.uniform(-60, 60), 'lng': rng.uniform(-180, 180)}}}]
+
+    def places_photo(self, photo_reference, max_width=None, max_height=None, **kwargs):
+        """Solid-colour JPEG, returned as a chunk iterator like googlemaps"""
+        # Imported here so loading a backend never pulls in Pillow
+        from PIL import Image
+        self._simulate_call('places_photo')
+        rng = self._rng('photo', photo_reference)
+        width = max_width or 800
+        image = Image.new('RGB', (width, width * 3 // 4), tuple(rng.randint(0, 255) for _ in range(3)))
+        output = io.BytesIO()
+        image.save(output, format='JPEG')
+        return iter([output.getvalue()])
+
+class FixtureBackend:
+    """Record/replay backend backed by a JSON fixture file
+
+    In 'record' mode every call is forwarded to the wrapped client and its
+    response (or ApiError) is saved under a key built from the method and
+    arguments. In 'replay' mode responses come only from the fixture file, so
+    a recorded session can be rerun without a network or API key. Repeated
+    calls with the same arguments replay their responses in recorded order.
+    """
+
+    def __init__(self, path, mode='replay', client=None):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown fixture mode: {mode}")
+        if mode == 'record' and client is None:
+            raise ValueError("Recording fixtures requires a client to forward calls to")
+        self.path = path
+        self.mode = mode
+        self.client = client
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._positions = Counter()
+        self._fixtures = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self._fixtures = json.load(f)
+        elif mode == 'replay':
+            raise FileNotFoundError(f"Fixture file not found: {path}")
+
+    @staticmethod
+    def _key(method, args, kwargs):
+        return json.dumps([method, list(args), kwargs], sort_keys=True, default=str)
+
+    def _call(self, method, *args, **kwargs):
+        key = self._key(method, args, kwargs)
+        with self._lock:
+            self.calls[method] += 1
+            position = self._positions[key]
+            self._positions[key] += 1
+
+        if self.mode == 'replay':
+            responses = self._fixtures.get(key)
+            if not responses:
+                raise googlemaps.exceptions.ApiError('NOT_FOUND', f"No recorded response for {key}")
+            return self._decode(method, responses[min(position, len(responses) - 1)])
+
+        try:
+            response = getattr(self.client, method)(*args, **kwargs)
+            if method == 'places_photo':
+                response = base64.b64encode(b''.join(response)).decode('ascii')
+            recorded = {'response': response}
+        except googlemaps.exceptions.ApiError as e:
+            recorded = {'error': {'status': e.status, 'message': e.message}}
+
+        with self._lock:
+            self._fixtures.setdefault(key, []).append(recorded)
+            self._save()
+        return self._decode(method, recorded)
+
+    @staticmethod
+    def _decode(method, recorded):
+        if 'error' in recorded:
+            raise googlemaps.exceptions.ApiError(recorded['error']['status'], recorded['error']['message'])
+        if method == 'places_photo':
+            return iter([base64.b64decode(recorded['response'])])
+        return recorded['response']
+
+    def _save(self):
+        """Write fixtures atomically so an interrupted recording stays readable"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._fixtures, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def places(self, *args, **kwargs):
+        return self._call('places', *args, **kwargs)
+
+    def place(self, *args, **kwargs):
+        return self._call('place', *args, **kwargs)
+
+    def geocode(self, *args, **kwargs):
+        return self._call('geocode', *args, **kwargs)
+
+    def places_photo(self, *args, **kwargs):
+        return self._call('places_photo', *args, **kwargs)
+
+def create_backend(spec, api_key=None, client_factory=None):
+    """Create a Places backend from a PLACES_BACKEND spec
+
+    'fake' or 'fake:latency=0.2,error_rate=0.05,results=60' builds a
+    FakePlacesBackend, 'record:<path>' wraps a real client and records to
+    path, and 'replay:<path>' serves responses from a recorded fixture. The
+    real client is built with client_factory(api_key), by default a plain
+    googlemaps.Client.
+    """
+    kind, _, options = spec.partition(':')
+    if kind == 'fake':
+        kwargs = {}
+        for option in filter(None, options.split(',')):
+            name, _, value = option.partition('=')
+            if name == 'error_statuses':
+                kwargs[name] = tuple(value.split('|'))
+            elif name in ('results', 'page_size', 'seed'):
+                kwargs[name] = int(value)
+            else:
+                kwargs[name] = float(value)
+        return FakePlacesBackend(**kwargs)
+    if kind == 'replay':
+        return FixtureBackend(options, mode='replay')
+    if kind == 'record':
+        client = client_factory(api_key) if client_factory else googlemaps.Client(key=api_key)
+        return FixtureBackend(options, mode='record', client=client)
+    raise ValueError(f"Unknown Places backend: {spec}")
@@ -0,0 +1,170 @@
+"""Headless bulk scoring of many (query, location) searches
+
+Reads a job file, runs every search through search_businesses in a pool of
+worker processes (each with its own thread pool for details lookups) and
+writes one table of businesses, deduplicated by Place ID.
+
+    python batch.py jobs.csv --output scores.csv
+    python batch.py jobs.jsonl --output scores.parquet --processes 8
+
+The job file is a CSV with query and location columns, or a JSON array or
+JSON lines file of records with the same keys. Each finished search is checkpointed next to the output, so
+rerunning the same command after an interruption skips the searches that
+already completed; pass --restart to start over. Searches always go to the
+Places API unless --max-age allows reusing recent cached results; fresh
+results are written back to the cache the app reads.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import data
+
+def load_jobs(path):
+    """Unique (query, location) pairs from a CSV, JSON or JSON lines job file, in file order"""
+    if path.endswith('.jsonl'):
+        with open(path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    elif path.endswith('.json'):
+        with open(path) as f:
+            records = json.load(f)
+    else:
+        records = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+
+    jobs, seen = [], set()
+    for record in records:
+        query = (record.get('query') or '').strip()
+        location = (record.get('location') or '').strip() or None
+        key = data.search_cache_key(query, location) if query else None
+        if key is None or key in seen:
+            continue
+        seen.add(key)
+        jobs.append((query, location))
+    return jobs
+
+def checkpoint_path(checkpoint_dir, query, location):
+    """File holding the finished result of one search"""
+    digest = hashlib.sha1(data.search_cache_key(query, location).encode()).hexdigest()
+    return os.path.join(checkpoint_dir, f"{digest}.json")
+
+def write_checkpoint(path, query, location, rows):
+    """Write a finished search atomically so an interrupted run never leaves half a file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'query': query, 'location': location, 'rows': rows}, f)
+    os.replace(tmp_path, path)
+
+def init_worker(max_qps):
+    """Give each worker process its share of the overall request rate (0 = unlimited)"""
+    data.scheduler.rate = max_qps
+    data.scheduler.burst = max(max_qps, 1)
+
+def run_job(query, location, threads, max_age):
+    """Run one search in a worker process; rows are None if it did not complete"""
+    outcome = {}
+    frame = data.search_businesses(query, location, max_workers=threads, outcome=outcome, max_age=max_age)
+    if not outcome.get('complete'):
+        return None
+    return frame.to_dict('records')
+
+def consolidate(checkpoint_dir, jobs):
+    """One table of every checkpointed business, keeping each Place ID's first match"""
+    frames = []
+    for query, location in jobs:
+        path = checkpoint_path(checkpoint_dir, query, location)
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            rows = json.load(f)['rows']
+        if rows:
+            frame = pd.DataFrame(rows)
+            frame.insert(0, 'Query', query)
+            frame.insert(1, 'Location', location or '')
+            frames.append(frame)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).drop_duplicates('Place ID', keep='first')
+
+def write_output(table, path):
+    """Write the result table as Parquet or CSV, by file extension"""
+    if path.endswith('.parquet'):
+        table.to_parquet(path, index=False)
+        return
+    table = table.copy()
+    if 'Review Highlights' in table:
+        table['Review Highlights'] = table['Review Highlights'].map(json.dumps)
+    table.to_csv(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('jobs', help='CSV, JSON or JSON lines file with query and location columns')
+    parser.add_argument('--output', default='batch_results.csv', help='.csv or .parquet result table')
+    parser.add_argument('--processes', type=int, default=min(os.cpu_count() or 1, 4))
+    parser.add_argument('--threads', type=int, default=data.DETAILS_MAX_WORKERS,
+                        help='concurrent details lookups per process')
+    parser.add_argument('--max-qps', type=float, default=data.PLACES_MAX_QPS,
+                        help='Places requests per second across all processes; 0 disables the limit')
+    parser.add_argument('--max-age', type=float, default=0,
+                        help='seconds a cached search or place details may be reused; 0 always fetches afresh')
+    parser.add_argument('--checkpoint-dir', help='defaults to <output>.checkpoints')
+    parser.add_argument('--restart', action='store_true', help='discard checkpoints from earlier runs')
+    args = parser.parse_args()
+
+    checkpoint_dir = args.checkpoint_dir or f"{args.output}.checkpoints"
+    if args.restart:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+
+    jobs = load_jobs(args.jobs)
+    pending = [job for job in jobs if not os.path.exists(checkpoint_path(checkpoint_dir, *job))]
+    print(f"{len(jobs)} searches, {len(jobs) - len(pending)} already done", file=sys.stderr)
+
+    failed = []
+    started = time.perf_counter()
+    if pending:
+        workers = min(args.processes, len(pending))
+        # spawn, not fork: workers must not inherit the parent's cache connections or threads
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(args.max_qps / workers,)
+        ) as executor:
+            futures = {
+                executor.submit(run_job, query, location, args.threads, args.max_age): (query, location)
+                for query, location in pending
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                query, location = futures[future]
+                label = f"{query!r} in {location!r}" if location else repr(query)
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    rows = None
+                    print(f"  {label}: {e}", file=sys.stderr)
+                if rows is None:
+                    failed.append((query, location))
+                    status = "incomplete, will retry on the next run"
+                else:
+                    write_checkpoint(checkpoint_path(checkpoint_dir, query, location), query, location, rows)
+                    status = f"{len(rows)} businesses"
+                print(f"[{done}/{len(pending)}] {label}: {status}", file=sys.stderr)
+
+    table = consolidate(checkpoint_dir, jobs)
+    write_output(table, args.output)
+    print(f"Wrote {len(table)} businesses to {args.output} in {time.perf_counter() - started:.1f}s",
+          file=sys.stderr)
+    if failed:
+        print(f"{len(failed)} searches did not complete; rerun to retry them", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
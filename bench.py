@@ -0,0 +1,286 @@
+"""Benchmarks for the search-to-render pipeline
+
+Drives search_businesses end to end against FakePlacesBackend with realistic
+per-call latency, then times the render path (display_comparison, both chart
+builders and the rating filter) and cold start in a fresh interpreter. No API
+key or network access is needed.
+
+    python bench.py                                   # run everything
+    python bench.py --sizes 20,60 --output base.json  # save results
+    python bench.py --compare base.json               # flag regressions
+
+Each benchmark reports p50/p95 wall time, Places calls per iteration and
+peak traced memory, and the whole run is written as JSON.
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Caches must point somewhere disposable before data.py reads its settings
+os.environ['CONSUMERCOMPASS_CACHE_DIR'] = tempfile.mkdtemp(prefix='consumercompass-bench-')
+os.environ['PLACES_BACKEND'] = 'fake:latency=0'
+
+import numpy as np
+import streamlit.logger
+
+import data
+import utils
+from backends import FakePlacesBackend
+from components import display_comparison
+
+# Rendering outside `streamlit run` logs a warning for every element
+streamlit.logger.set_log_level(logging.ERROR)
+
+def git_commit():
+    """Current commit hash, if the benchmark runs inside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def total_calls(backend):
+    """Places calls made through backend so far"""
+    return sum(backend.calls.values())
+
+def measure(run, iterations, backend, setup=None):
+    """Time run() over several iterations, with setup() excluded from timings"""
+    timings, calls, peaks = [], [], []
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        calls_before = total_calls(backend)
+        tracemalloc.start()
+        started = time.perf_counter()
+        # Keep data.py's progress output out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+        timings.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        calls.append(total_calls(backend) - calls_before)
+
+    return {
+        'iterations': iterations,
+        'p50_ms': float(np.percentile(timings, 50)) * 1000,
+        'p95_ms': float(np.percentile(timings, 95)) * 1000,
+        'mean_ms': float(np.mean(timings)) * 1000,
+        'network_calls': float(np.mean(calls)),
+        'peak_memory_kb': max(peaks) / 1024,
+    }
+
+def bench_search(size, iterations, latency, jitter, page_token_delay):
+    """Cold-cache search of `size` places, as a first-time visitor would see it"""
+    # The live API pages at 20 results; larger synthetic runs use bigger pages
+    # so the benchmark measures enrichment rather than page-token waits
+    backend = FakePlacesBackend(
+        results=size,
+        latency=latency,
+        jitter=jitter,
+        page_token_delay=page_token_delay,
+        page_size=20 if size <= 60 else 100
+    )
+    data.set_backend(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        data.verify_api_key()
+
+    def run():
+        frame = data.search_businesses('coffee shops', 'San Francisco')
+        if len(frame) != size:
+            raise RuntimeError(f"Expected {size} businesses, got {len(frame)}")
+
+    def clear_caches():
+        data.details_cache.clear()
+        shutil.rmtree(data.SNAPSHOT_DIR, ignore_errors=True)
+
+    return measure(run, iterations, backend, setup=clear_caches)
+
+# Cold start benchmarks, each run in a fresh interpreter as (setup, timed statement)
+STARTUP_SCRIPTS = {
+    # What a new worker imports before it can serve the app
+    'startup.import': ('', 'import data, components, utils, results'),
+    # First rerun of main.py on a fresh worker, up to the search form
+    'startup.first_run': (
+        'from streamlit.testing.v1 import AppTest; app = AppTest.from_file("main.py", default_timeout=60)',
+        'app.run()'
+    ),
+}
+
+STARTUP_TEMPLATE = """
+import json, resource, time
+{setup}
+started = time.perf_counter()
+{statement}
+print(json.dumps({{
+    'seconds': time.perf_counter() - started,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+"""
+
+def bench_startup(iterations):
+    """Cold start timings, one fresh interpreter per iteration
+
+    Peak memory is the child's maximum resident set size rather than traced
+    allocations, and Places calls made in the child are not counted.
+    """
+    results = {}
+    for name, (setup, statement) in STARTUP_SCRIPTS.items():
+        script = STARTUP_TEMPLATE.format(setup=setup, statement=statement)
+        timings, peaks = [], []
+        for _ in range(iterations):
+            output = subprocess.run(
+                [sys.executable, '-c', script],
+                capture_output=True, text=True, check=True,
+                cwd=os.path.dirname(os.path.abspath(__file__))
+            ).stdout
+            measurement = json.loads(output.strip().splitlines()[-1])
+            timings.append(measurement['seconds'])
+            peaks.append(measurement['max_rss_kb'])
+        results[name] = {
+            'iterations': iterations,
+            'p50_ms': float(np.percentile(timings, 50)) * 1000,
+            'p95_ms': float(np.percentile(timings, 95)) * 1000,
+            'mean_ms': float(np.mean(timings)) * 1000,
+            'network_calls': 0.0,
+            'peak_memory_kb': float(max(peaks)),
+        }
+    return results
+
+def bench_render(iterations):
+    """Render path timings over a 60-place result, with cold and warm chart caches"""
+    backend = FakePlacesBackend(results=60, latency=0)
+    data.set_backend(backend)
+    with contextlib.redirect_stdout(io.StringIO()):
+        frame = data.search_businesses('coffee shops', 'San Francisco')
+        places = FakePlacesBackend(results=10000, page_size=10000, latency=0).places('filter')['results']
+        large_frame = data.sort_by_rating(data.build_business_frame(places, [{}] * len(places)))
+    place_id1, place_id2 = frame.index[0], frame.index[1]
+
+    def clear_figures():
+        utils._rating_distribution_figure.cache_clear()
+        utils._comparison_radar_figure.cache_clear()
+
+    # Warm photo and details caches so render timings exclude first downloads
+    with contextlib.redirect_stdout(io.StringIO()):
+        display_comparison(frame, frame, place_id1, place_id2)
+
+    return {
+        'render.display_comparison.cold': measure(
+            lambda: display_comparison(frame, frame, place_id1, place_id2),
+            iterations, backend, setup=clear_figures
+        ),
+        'render.display_comparison.warm': measure(
+            lambda: display_comparison(frame, frame, place_id1, place_id2),
+            iterations, backend
+        ),
+        'render.rating_distribution_chart.cold': measure(
+            lambda: utils.create_rating_distribution_chart(frame, place_id1),
+            iterations, backend, setup=clear_figures
+        ),
+        'render.rating_distribution_chart.warm': measure(
+            lambda: utils.create_rating_distribution_chart(frame, place_id1),
+            iterations, backend
+        ),
+        'render.comparison_radar_chart.cold': measure(
+            lambda: utils.create_comparison_radar_chart(frame, place_id1, place_id2),
+            iterations, backend, setup=clear_figures
+        ),
+        'render.comparison_radar_chart.warm': measure(
+            lambda: utils.create_comparison_radar_chart(frame, place_id1, place_id2),
+            iterations, backend
+        ),
+        'render.filter_by_rating.10000': measure(
+            lambda: data.filter_by_rating(large_frame, 3.5),
+            iterations, backend
+        ),
+    }
+
+def compare(results, baseline, threshold):
+    """Print p50 changes against a baseline run and return the regressed benchmarks"""
+    regressions = []
+    print(f"\nComparison with {baseline.get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if not previous or not previous['p50_ms']:
+            print(f"  {name:45} new")
+            continue
+        change = result['p50_ms'] / previous['p50_ms'] - 1
+        flag = ''
+        if change > threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"  {name:45} {previous['p50_ms']:10.2f} -> {result['p50_ms']:10.2f} ms ({change:+.1%}){flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='20,60,1000', help='comma-separated search sizes')
+    parser.add_argument('--search-iterations', type=int, default=5)
+    parser.add_argument('--render-iterations', type=int, default=50)
+    parser.add_argument('--startup-iterations', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.1, help='simulated seconds per Places call')
+    parser.add_argument('--jitter', type=float, default=0.05, help='extra random seconds per call')
+    parser.add_argument('--page-token-delay', type=float, default=1.5,
+                        help='seconds before a next_page_token becomes valid')
+    parser.add_argument('--skip-search', action='store_true')
+    parser.add_argument('--skip-render', action='store_true')
+    parser.add_argument('--skip-startup', action='store_true')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='p50 slowdown counted as a regression')
+    args = parser.parse_args()
+
+    results = {}
+    if not args.skip_search:
+        for size in (int(size) for size in args.sizes.split(',') if size):
+            name = f"search.{size}"
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = bench_search(
+                size, args.search_iterations, args.latency, args.jitter, args.page_token_delay
+            )
+    if not args.skip_render:
+        print("Running render benchmarks...", file=sys.stderr)
+        results.update(bench_render(args.render_iterations))
+    if not args.skip_startup:
+        print("Running startup benchmarks...", file=sys.stderr)
+        results.update(bench_startup(args.startup_iterations))
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'config': vars(args),
+        'results': results,
+    }
+
+    print(f"{'benchmark':45} {'p50 ms':>10} {'p95 ms':>10} {'calls':>8} {'peak KiB':>10}")
+    for name, result in results.items():
+        print(f"{name:45} {result['p50_ms']:10.2f} {result['p95_ms']:10.2f} "
+              f"{result['network_calls']:8.1f} {result['peak_memory_kb']:10.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
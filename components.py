@@ -1,16 +1,19 @@
 import streamlit as st
-import plotly.express as px
-from utils import create_rating_distribution_chart, create_comparison_radar_chart
-from data import get_review_highlights, get_business_image
+from utils import create_rating_distribution_chart, create_comparison_radar_chart, create_multi_comparison_radar_chart
+from data import (
+    get_review_highlights, get_review_highlights_batch, get_business_image, get_business_images_batch,
+    compare_businesses
+)
+import metrics
 
-def display_business_metrics(data, business_name):
+@metrics.timed('render.business_metrics')
+def display_business_metrics(data, place_id):
     """Display key metrics for a single business"""
-    business_data = data[data['Business Name'] == business_name]
-    if business_data.empty:
-        st.error(f"Business '{business_name}' was filtered out due to the minimum rating requirement.")
+    if place_id not in data.index:
+        st.error("This business was filtered out due to the minimum rating requirement.")
         return
 
-    business = business_data.iloc[0]
+    business = data.loc[place_id]
 
     # Check screen width dynamically - use more columns on wider screens
     # and stack vertically on mobile screens
@@ -57,10 +60,15 @@ def display_business_metrics(data, business_name):
         """, unsafe_allow_html=True)
 
     # Responsive charts
-    st.plotly_chart(create_rating_distribution_chart(data, business_name), use_container_width=True, key=f"rating_chart_{business_name}")
+    chart = create_rating_distribution_chart(data, place_id)
+    with metrics.span('render.plotly_chart'):
+        st.plotly_chart(chart, use_container_width=True, key=f"rating_chart_{place_id}")
 
     st.subheader("Review Highlights")
-    highlights = get_review_highlights(business['Place ID'])
+    # Highlights are normally computed during the search; fetch them only for older rows
+    highlights = business.get('Review Highlights')
+    if not isinstance(highlights, list):
+        highlights = get_review_highlights(place_id)
     
     # Add custom styling for review highlights
     for highlight in highlights:
@@ -72,16 +80,21 @@ def display_business_metrics(data, business_name):
         </div>
         """, unsafe_allow_html=True)
 
-def display_comparison(data, business1, business2):
-    """Display side-by-side comparison of two businesses"""
-    # Check if businesses exist in the filtered data
-    business1_data = data[data['Business Name'] == business1]
-    business2_data = data[data['Business Name'] == business2]
+@metrics.timed('render.comparison')
+def display_comparison(data, all_data, place_id1, place_id2):
+    """Display side-by-side comparison of two businesses
+
+    data is the rating-filtered frame and all_data the full search result,
+    both indexed by place ID; all_data supplies names of filtered businesses.
+    """
+    business1 = all_data.loc[place_id1, 'Business Name']
+    business2 = all_data.loc[place_id2, 'Business Name']
 
+    # Check if businesses exist in the filtered data
     missing_businesses = []
-    if business1_data.empty:
+    if place_id1 not in data.index:
         missing_businesses.append(business1)
-    if business2_data.empty:
+    if place_id2 not in data.index:
         missing_businesses.append(business2)
 
     if missing_businesses:
@@ -108,7 +121,7 @@ def display_comparison(data, business1, business2):
             <h3 style="margin: 0;">{business1}</h3>
         </div>
         """, unsafe_allow_html=True)
-        display_business_metrics(data, business1)
+        display_business_metrics(data, place_id1)
         
         # Add a visual separator
         st.markdown("<hr style='margin: 20px 0; border-color: #ddd;'>", unsafe_allow_html=True)
@@ -119,7 +132,7 @@ def display_comparison(data, business1, business2):
             <h3 style="margin: 0;">{business2}</h3>
         </div>
         """, unsafe_allow_html=True)
-        display_business_metrics(data, business2)
+        display_business_metrics(data, place_id2)
     else:  # Desktop view - side by side
         col1, col2 = st.columns(2)
         with col1:
@@ -128,14 +141,14 @@ def display_comparison(data, business1, business2):
                 <h3 style="margin: 0;">{business1}</h3>
             </div>
             """, unsafe_allow_html=True)
-            display_business_metrics(data, business1)
+            display_business_metrics(data, place_id1)
         with col2:
             st.markdown(f"""
             <div style="background-color: #fff7e6; padding: 10px; border-radius: 5px;">
                 <h3 style="margin: 0;">{business2}</h3>
             </div>
             """, unsafe_allow_html=True)
-            display_business_metrics(data, business2)
+            display_business_metrics(data, place_id2)
 
     # Comparison radar chart with responsive styling
     st.markdown("""
@@ -143,15 +156,14 @@ def display_comparison(data, business1, business2):
         <h3 style="margin: 0 0 10px 0; text-align: center;">Comparison Chart</h3>
     </div>
     """, unsafe_allow_html=True)
-    st.plotly_chart(create_comparison_radar_chart(data, business1, business2), use_container_width=True, key=f"comparison_chart_{business1}_{business2}")
-    
-    # Get place IDs for both businesses
-    business1_place_id = business1_data.iloc[0]['Place ID']
-    business2_place_id = business2_data.iloc[0]['Place ID']
+    chart = create_comparison_radar_chart(data, place_id1, place_id2)
+    with metrics.span('render.plotly_chart'):
+        st.plotly_chart(chart, use_container_width=True, key=f"comparison_chart_{place_id1}_{place_id2}")
     
     # Get business images
-    business1_image = get_business_image(business1_place_id)
-    business2_image = get_business_image(business2_place_id)
+    with metrics.span('render.images'):
+        business1_image = get_business_image(place_id1)
+        business2_image = get_business_image(place_id2)
     
     # Display business images section header
     st.markdown("""
@@ -164,68 +176,94 @@ def display_comparison(data, business1, business2):
     if business1_image or business2_image:
         # Create responsive layout for images
         if screen_width <= 768:  # Mobile view - stack vertically
-            # First business image
-            if business1_image:
-                st.markdown(f"""
-                <div style="background-color: #e6f7ff; padding: 10px; border-radius: 5px; margin-top: 10px; text-align: center;">
-                    <h4 style="margin: 0 0 10px 0;">{business1}</h4>
-                    <img src="{business1_image}" alt="{business1}" style="max-width: 100%; height: auto; border-radius: 5px; max-height: 300px; object-fit: cover;">
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style="background-color: #e6f7ff; padding: 10px; border-radius: 5px; margin-top: 10px; text-align: center;">
-                    <h4 style="margin: 0 0 10px 0;">{business1}</h4>
-                    <p>No image available</p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-            # Second business image
-            if business2_image:
-                st.markdown(f"""
-                <div style="background-color: #fff7e6; padding: 10px; border-radius: 5px; margin-top: 10px; text-align: center;">
-                    <h4 style="margin: 0 0 10px 0;">{business2}</h4>
-                    <img src="{business2_image}" alt="{business2}" style="max-width: 100%; height: auto; border-radius: 5px; max-height: 300px; object-fit: cover;">
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown(f"""
-                <div style="background-color: #fff7e6; padding: 10px; border-radius: 5px; margin-top: 10px; text-align: center;">
-                    <h4 style="margin: 0 0 10px 0;">{business2}</h4>
-                    <p>No image available</p>
-                </div>
-                """, unsafe_allow_html=True)
+            display_business_image(business1, business1_image, "#e6f7ff", margin_top="10px")
+            display_business_image(business2, business2_image, "#fff7e6", margin_top="10px")
         else:  # Desktop view - side by side
             col1, col2 = st.columns(2)
             with col1:
-                if business1_image:
-                    st.markdown(f"""
-                    <div style="background-color: #e6f7ff; padding: 10px; border-radius: 5px; text-align: center;">
-                        <h4 style="margin: 0 0 10px 0;">{business1}</h4>
-                        <img src="{business1_image}" alt="{business1}" style="max-width: 100%; height: auto; border-radius: 5px; max-height: 250px; object-fit: cover;">
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div style="background-color: #e6f7ff; padding: 10px; border-radius: 5px; text-align: center;">
-                        <h4 style="margin: 0 0 10px 0;">{business1}</h4>
-                        <p>No image available</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                display_business_image(business1, business1_image, "#e6f7ff")
             with col2:
-                if business2_image:
-                    st.markdown(f"""
-                    <div style="background-color: #fff7e6; padding: 10px; border-radius: 5px; text-align: center;">
-                        <h4 style="margin: 0 0 10px 0;">{business2}</h4>
-                        <img src="{business2_image}" alt="{business2}" style="max-width: 100%; height: auto; border-radius: 5px; max-height: 250px; object-fit: cover;">
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div style="background-color: #fff7e6; padding: 10px; border-radius: 5px; text-align: center;">
-                        <h4 style="margin: 0 0 10px 0;">{business2}</h4>
-                        <p>No image available</p>
-                    </div>
-                    """, unsafe_allow_html=True)
+                display_business_image(business2, business2_image, "#fff7e6")
     else:
-        st.info("No images available for these businesses")
\ No newline at end of file
+        st.info("No images available for these businesses")
+
+@metrics.timed('render.multi_comparison')
+def display_multi_comparison(data, all_data, place_ids):
+    """Display a ranking table, radar chart and details for several businesses
+
+    Arguments are as for display_comparison. Metrics for all businesses come
+    from one vectorized pass, and missing highlights and all images are
+    fetched in one concurrent batch.
+    """
+    missing_businesses = [all_data.loc[place_id, 'Business Name'] for place_id in place_ids if place_id not in data.index]
+    place_ids = [place_id for place_id in place_ids if place_id in data.index]
+    if missing_businesses:
+        st.warning(f"The following businesses were filtered out due to low rating: {', '.join(missing_businesses)}")
+    if len(place_ids) < 2:
+        st.info("Try adjusting the minimum rating filter to include at least two businesses.")
+        return
+
+    st.markdown(f"""
+    <div style="background-color: #f0f2f6; padding: 10px; border-radius: 10px; margin: 10px 0; text-align: center;">
+        <h2 style="margin: 0; color: #1e3a8a;">Business Comparison</h2>
+        <p style="margin: 5px 0 0 0; font-size: 0.9rem;">Comparing {len(place_ids)} businesses</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    # Ranking table; click a column header to sort by it
+    st.dataframe(
+        compare_businesses(data, place_ids),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'Weighted Rating': st.column_config.NumberColumn(format="%.2f ⭐"),
+            'Average Rating': st.column_config.NumberColumn(format="%.1f ⭐"),
+            'Positive %': st.column_config.NumberColumn(format="%.0f%%"),
+            'Negative %': st.column_config.NumberColumn(format="%.0f%%"),
+        }
+    )
+
+    st.markdown("""
+    <div style="background-color: #f0f2f6; padding: 10px; border-radius: 10px; margin-top: 20px;">
+        <h3 style="margin: 0 0 10px 0; text-align: center;">Comparison Chart</h3>
+    </div>
+    """, unsafe_allow_html=True)
+    chart = create_multi_comparison_radar_chart(data, place_ids)
+    with metrics.span('render.plotly_chart'):
+        st.plotly_chart(chart, use_container_width=True, key=f"multi_comparison_chart_{'_'.join(place_ids)}")
+
+    # Highlights are normally computed during the search; fetch any missing ones together
+    highlights = {
+        place_id: data.loc[place_id, 'Review Highlights'] if 'Review Highlights' in data.columns else None
+        for place_id in place_ids
+    }
+    missing_highlights = [place_id for place_id, value in highlights.items() if not isinstance(value, list)]
+    if missing_highlights:
+        highlights.update(get_review_highlights_batch(missing_highlights))
+    with metrics.span('render.images'):
+        images = get_business_images_batch(place_ids)
+
+    for place_id in place_ids:
+        business_name = data.loc[place_id, 'Business Name']
+        with st.expander(business_name):
+            if images.get(place_id):
+                st.image(images[place_id], caption=business_name, use_container_width=True)
+            for highlight in highlights[place_id]:
+                st.markdown(f"""
+                <div style="background-color: #f8f9fa; padding: 10px;
+                            border-radius: 5px; margin-bottom: 8px;
+                            box-shadow: 0 1px 2px rgba(0,0,0,0.1);">
+                    {highlight}
+                </div>
+                """, unsafe_allow_html=True)
+
+def display_business_image(business_name, image, background_color, margin_top="0"):
+    """Display a business's cached photo thumbnail under a colored name header"""
+    st.markdown(f"""
+    <div style="background-color: {background_color}; padding: 10px; border-radius: 5px; margin-top: {margin_top}; text-align: center;">
+        <h4 style="margin: 0;">{business_name}</h4>
+        {"" if image else "<p>No image available</p>"}
+    </div>
+    """, unsafe_allow_html=True)
+    if image:
+        st.image(image, caption=business_name, use_container_width=True)
@@ -1,49 +1,498 @@
 import pandas as pd
 import numpy as np
 import googlemaps
+import requests
+import asyncio
 import os
+import collections
+import csv
+import hashlib
+import io
+import json
+import logging
+import queue
+import sqlite3
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pyarrow as pa
+import pyarrow.ipc
+from backends import create_backend
+from scheduler import (
+    RequestScheduler, ScheduledClient, SchedulerClock, run_with_clock, request_priority,
+    PRIORITY_HIGHLIGHTS, PRIORITY_PREFETCH
+)
+import metrics
 
-# Initialize Google Maps client
+logger = logging.getLogger(__name__)
+
+# Every Places call in the process shares one rate limit, see scheduler.py. The
+# default matches Google's standard quota of 6,000 requests per minute.
+PLACES_MAX_QPS = float(os.environ.get('PLACES_MAX_QPS', '100'))
+PLACES_BURST = int(os.environ.get('PLACES_BURST', '0')) or None
+# Eight retries back off for 20-40s in total, enough to ride out a quota burst;
+# this backoff does not count against PLACES_DETAILS_TIMEOUT
+PLACES_QUOTA_MAX_RETRIES = int(os.environ.get('PLACES_QUOTA_MAX_RETRIES', '8'))
+scheduler = RequestScheduler(PLACES_MAX_QPS, PLACES_BURST, max_retries=PLACES_QUOTA_MAX_RETRIES)
+
+# Live Places calls (text search, details, geocode and photos) share one
+# keep-alive connection pool, so concurrent lookups reuse TLS connections
+# instead of handshaking for every request
+PLACES_HTTP_POOL_SIZE = int(os.environ.get('PLACES_HTTP_POOL_SIZE', '32'))
+PLACES_HTTP_CONNECT_TIMEOUT = float(os.environ.get('PLACES_HTTP_CONNECT_TIMEOUT', '5'))
+PLACES_HTTP_READ_TIMEOUT = float(os.environ.get('PLACES_HTTP_READ_TIMEOUT', '10'))
+PLACES_HTTP_GZIP = os.environ.get('PLACES_HTTP_GZIP', '1') != '0'
+
+# googlemaps.Client has its own per-client throttle; the scheduler replaces it,
+# see create_places_client
+CLIENT_UNTHROTTLED_QPS = 1_000_000
+
+# The Places client is created on first use, not at import, so processes and
+# sessions that never call the API don't pay for it. Use get_client() to read it.
 gmaps = None
+http_session = None
+_gmaps_lock = threading.RLock()
+
+def create_http_session():
+    """A requests session with a keep-alive pool sized for concurrent Places calls"""
+    session = requests.Session()
+    # Every Places call is an idempotent GET, so a connection the server closed
+    # while it sat in the pool is safe to retry
+    retries = Retry(total=2, connect=2, read=1, status=0, backoff_factor=0.1, allowed_methods=['GET'])
+    # Photos redirect to a second host, so keep a pool per host for a few hosts
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PLACES_HTTP_POOL_SIZE, max_retries=retries)
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip, deflate' if PLACES_HTTP_GZIP else 'identity'
+    return session
+
+class PlacesClient(googlemaps.Client):
+    """googlemaps.Client that downloads photos in one read
+
+    The library's places_photo streams the body through iter_content(),
+    whose default chunk size is a single byte.
+    """
+
+    def places_photo(self, photo_reference, max_width=None, max_height=None):
+        """Photo bytes as a one-chunk iterable, like the library's chunk iterator"""
+        if not (max_width or max_height):
+            raise ValueError("a max_width or max_height arg is required")
+        params = {'photoreference': photo_reference}
+        if max_width:
+            params['maxwidth'] = max_width
+        if max_height:
+            params['maxheight'] = max_height
+        response = self._request('/maps/api/place/photo', params, extract_body=lambda response: response)
+        if response.status_code != 200:
+            # Raised inside the scheduler, so a 429 is retried like other quota errors
+            raise googlemaps.exceptions.HTTPError(response.status_code)
+        return [response.content]
+
+def create_places_client(api_key):
+    """A PlacesClient on the shared HTTP session, with our timeouts"""
+    global http_session
+    with _gmaps_lock:
+        if http_session is None:
+            http_session = create_http_session()
+    client = PlacesClient(
+        key=api_key,
+        requests_session=http_session,
+        connect_timeout=PLACES_HTTP_CONNECT_TIMEOUT,
+        read_timeout=PLACES_HTTP_READ_TIMEOUT,
+        # Quota errors are retried by the scheduler, with jitter and priorities
+        retry_over_query_limit=False,
+        queries_per_second=CLIENT_UNTHROTTLED_QPS,
+        queries_per_minute=CLIENT_UNTHROTTLED_QPS * 60
+    )
+    # The client only sleeps once len(sent_times) reaches its quota, which a
+    # one-slot deque never does. Left at the quota's size it would keep a
+    # timestamp of every call, megabytes in a long-running worker.
+    client.sent_times = collections.deque(maxlen=1)
+    return client
 
 def initialize_gmaps():
-    """Initialize Google Maps client"""
+    """Initialize Google Maps client
+
+    PLACES_BACKEND selects an offline stand-in instead of the live API, see
+    backends.create_backend.
+    """
     global gmaps
-    try:
-        api_key = os.environ.get('GOOGLE_PLACES_API_KEY')
-        if not api_key:
-            print("No API key found in environment variables")
+    with _gmaps_lock:
+        try:
+            backend = os.environ.get('PLACES_BACKEND', 'google')
+            if backend != 'google':
+                # A recording backend wraps a live client with the same transport and retries
+                client = create_backend(
+                    backend,
+                    api_key=os.environ.get('GOOGLE_PLACES_API_KEY'),
+                    client_factory=create_places_client
+                )
+                gmaps = ScheduledClient(client, scheduler)
+                return True
+
+            api_key = os.environ.get('GOOGLE_PLACES_API_KEY')
+            if not api_key:
+                logger.warning("No API key found in environment variables")
+                return False
+            gmaps = ScheduledClient(create_places_client(api_key), scheduler)
+            return True
+        except Exception as e:
+            logger.error("Error initializing Google Maps client: %s", e)
             return False
-        gmaps = googlemaps.Client(key=api_key)
-        return True
-    except Exception as e:
-        print(f"Error initializing Google Maps client: {str(e)}")
-        return False
 
-# Try to initialize on module load
-initialize_gmaps()
+def get_client():
+    """The Places client, initialized on first use; None if that fails"""
+    if gmaps is None:
+        with _gmaps_lock:
+            # Another thread may have initialized it while this one waited
+            if gmaps is None:
+                initialize_gmaps()
+    return gmaps
 
-def verify_api_key():
-    """Verify if the API key is working"""
+def set_backend(backend):
+    """Route all Places calls through backend, e.g. a FakePlacesBackend
+
+    Calls still go through the shared scheduler. Cached API key checks are
+    cleared so the new backend is verified afresh.
+    """
     global gmaps
+    with _gmaps_lock:
+        gmaps = ScheduledClient(backend, scheduler)
+    invalidate_api_key_check()
+
+class AsyncPlacesClient:
+    """Awaitable Places calls for asyncio callers
+
+    Each call runs on a worker thread through get_client(), so it shares the
+    connection pool, rate limit and request priority of synchronous calls.
+    """
+
+    async def places(self, *args, **kwargs):
+        return await asyncio.to_thread(lambda: get_client().places(*args, **kwargs))
+
+    async def place(self, *args, **kwargs):
+        return await asyncio.to_thread(lambda: get_client().place(*args, **kwargs))
+
+    async def geocode(self, *args, **kwargs):
+        return await asyncio.to_thread(lambda: get_client().geocode(*args, **kwargs))
+
+    async def places_photo(self, *args, **kwargs):
+        """Photo bytes; unlike the client's places_photo, not a chunk iterator"""
+        return await asyncio.to_thread(lambda: b''.join(get_client().places_photo(*args, **kwargs)))
+
+async_gmaps = AsyncPlacesClient()
+
+# Place details are fetched concurrently with a bounded worker pool
+DETAILS_MAX_WORKERS = int(os.environ.get('PLACES_DETAILS_WORKERS', '8'))
+DETAILS_TIMEOUT = float(os.environ.get('PLACES_DETAILS_TIMEOUT', '10'))
+
+# A next_page_token becomes valid shortly after it is issued; poll for it with backoff
+NEXT_PAGE_INITIAL_DELAY = float(os.environ.get('PLACES_NEXT_PAGE_DELAY', '0.3'))
+NEXT_PAGE_BACKOFF = 1.3
+NEXT_PAGE_MAX_ATTEMPTS = 10
+
+# On-disk caches live here so they survive restarts and are shared between workers
+CACHE_DIR = os.environ.get('CONSUMERCOMPASS_CACHE_DIR', '.cache')
+DETAILS_CACHE_TTL = float(os.environ.get('PLACES_DETAILS_CACHE_TTL', str(24 * 60 * 60)))
+DETAILS_CACHE_MAX_ENTRIES = int(os.environ.get('PLACES_DETAILS_CACHE_MAX_ENTRIES', '5000'))
+
+class PersistentCache:
+    """JSON key/value cache in a local SQLite table with TTL expiry and LRU eviction
+
+    SQLite handles locking between processes, so every Streamlit worker on the
+    machine reads and writes the same entries. Cache errors are logged and
+    treated as misses so a broken cache never breaks a lookup.
+    """
+
+    def __init__(self, table, ttl, max_entries, path=None):
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path or os.path.join(CACHE_DIR, 'consumercompass.sqlite3')
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.table}_accessed_at '
+                f'ON {self.table} (accessed_at)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key, max_age=None):
+        """Return the cached value for key, or None if missing or expired
+
+        Entries older than max_age seconds, if given, are treated as misses
+        but kept for other callers.
+        """
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    f'SELECT value, created_at FROM {self.table} WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] > self.ttl:
+                    conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                    conn.commit()
+                    return None
+                if max_age is not None and now - row[1] > max_age:
+                    return None
+                conn.execute(
+                    f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key)
+                )
+                conn.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, OSError, ValueError) as e:
+            logger.warning("Error reading %s cache: %s", self.table, e)
+            return None
+
+    def set(self, key, value):
+        """Store value for key, evicting expired and least recently used entries"""
+        try:
+            payload = json.dumps(value)
+            with self._lock:
+                conn = self._connect()
+                now = time.time()
+                conn.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    (key, payload, now, now)
+                )
+                conn.execute(f'DELETE FROM {self.table} WHERE created_at < ?', (now - self.ttl,))
+                conn.execute(
+                    f'DELETE FROM {self.table} WHERE key IN ('
+                    f'SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                    (self.max_entries,)
+                )
+                conn.commit()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            logger.warning("Error writing %s cache: %s", self.table, e)
+
+    def clear(self):
+        """Remove every entry from the cache"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(f'DELETE FROM {self.table}')
+                conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Error clearing %s cache: %s", self.table, e)
+
+    def delete(self, key):
+        """Remove key from the cache"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Error deleting from %s cache: %s", self.table, e)
+
+class DiskCacheBudget:
+    """Keeps files ending in suffix under directory within max_bytes
+
+    The directory is scanned once and the total then tracked as files are
+    added, so it is only walked again when the total passes max_bytes. Least
+    recently used files are then deleted down to EVICT_LOW_WATER of the budget
+    so writes near the limit do not rescan every time. Files written by other
+    workers are counted at the next scan.
+    """
+    EVICT_LOW_WATER = 0.9
+
+    def __init__(self, directory, suffix, max_bytes):
+        self.directory = directory
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def added(self, size, replaced=0):
+        """Account for a new file of size bytes, replacing one of replaced bytes"""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(file_size for _, file_size, _ in self._scan())
+            else:
+                self._size += size - replaced
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _scan(self):
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(self.suffix):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self):
+        """Delete least recently used files and return the remaining total"""
+        files = self._scan()
+        total_size = sum(size for _, size, _ in files)
+        target = self.max_bytes * self.EVICT_LOW_WATER
+        for _, size, path in sorted(files):
+            if total_size <= target:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+        return total_size
+
+# Rating distribution columns, from best to worst
+RATING_COLUMNS = ['5_star', '4_star', '3_star', '2_star', '1_star']
+
+# Place details fields each caller consumes, so requests stay in the cheapest
+# billing tier and download only what is used
+SEARCH_DETAILS_FIELDS = ['website', 'reviews']
+HIGHLIGHT_FIELDS = ['reviews']
+IMAGE_FIELDS = ['photo']
+
+# Fields already present in a text search result, which never need fetching again
+TEXT_SEARCH_FIELDS = [
+    'business_status', 'formatted_address', 'geometry', 'name', 'photo',
+    'place_id', 'rating', 'type', 'user_ratings_total'
+]
+
+# Place details keyed by place_id, shared by search, highlights and images
+details_cache = PersistentCache('place_details', DETAILS_CACHE_TTL, DETAILS_CACHE_MAX_ENTRIES)
+
+# Photo thumbnails are stored on disk by content hash; the index maps photo
+# references to hashes so repeat comparisons never refetch from Google
+PHOTO_MAX_WIDTH = 400
+PHOTO_JPEG_QUALITY = 85
+PHOTO_CACHE_DIR = os.path.join(CACHE_DIR, 'photos')
+PHOTO_CACHE_MAX_BYTES = int(float(os.environ.get('PLACES_PHOTO_CACHE_MAX_MB', '200')) * 1024 * 1024)
+photo_index = PersistentCache('photo_index', 30 * 24 * 60 * 60, 50000)
+photo_budget = DiskCacheBudget(PHOTO_CACHE_DIR, '.jpg', PHOTO_CACHE_MAX_BYTES)
+
+# Geocoded locations change rarely, so lookups are kept for a long time. A
+# gazetteer CSV (name,lat,lng) can supply common places without any API call.
+GEOCODE_CACHE_TTL = float(os.environ.get('PLACES_GEOCODE_CACHE_TTL', str(90 * 24 * 60 * 60)))
+GEOCODE_CACHE_MAX_ENTRIES = 10000
+GAZETTEER_PATH = os.environ.get('PLACES_GAZETTEER')
+geocode_cache = PersistentCache('geocode', GEOCODE_CACHE_TTL, GEOCODE_CACHE_MAX_ENTRIES)
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+# Complete search results are kept as Arrow IPC snapshots, one per normalized
+# query and location, so warm starts memory-map them instead of rebuilding
+# frames, and the batch job and the UI read the same data. Snapshots older
+# than SEARCH_CACHE_TTL are still served for SEARCH_CACHE_STALE_TTL more
+# seconds while a background search refreshes them.
+SEARCH_CACHE_TTL = float(os.environ.get('PLACES_SEARCH_CACHE_TTL', str(60 * 60)))
+SEARCH_CACHE_STALE_TTL = float(os.environ.get('PLACES_SEARCH_CACHE_STALE_TTL', str(24 * 60 * 60)))
+_refreshing_searches = set()
+_refreshing_lock = threading.Lock()
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, 'snapshots')
+SNAPSHOT_CACHE_MAX_BYTES = int(float(os.environ.get('PLACES_SNAPSHOT_CACHE_MAX_MB', '500')) * 1024 * 1024)
+snapshot_budget = DiskCacheBudget(SNAPSHOT_DIR, '.arrow', SNAPSHOT_CACHE_MAX_BYTES)
+
+def get_place_details(place_id, fields=None, search_result=None, max_age=None):
+    """Get place details through the on-disk cache
+
+    Only the requested fields are fetched (all fields if fields is None). A
+    cached entry is reused when it already covers the requested fields;
+    otherwise just the missing fields are fetched and merged into it. Passing
+    the place's text search result lets its fields count as already fetched.
+    Cached entries older than max_age seconds are refetched.
+    """
+    cached_fields, result = [], {}
+    entry = details_cache.get(place_id, max_age)
+    if entry is not None:
+        cached_fields, result = entry['fields'], entry['result']
+    if search_result is not None and cached_fields is not None:
+        cached_fields = sorted(set(cached_fields) | set(TEXT_SEARCH_FIELDS))
+        result = {**search_result, **result}
+
+    if cached_fields is None or (fields is not None and set(fields) <= set(cached_fields)):
+        metrics.increment('places.details.cache_hits')
+        if search_result is not None and entry is None:
+            details_cache.set(place_id, {'fields': cached_fields, 'result': result})
+        return result
+
+    metrics.increment('places.details.cache_misses')
+    if fields is None:
+        with metrics.span('places.details'):
+            result = {**result, **get_client().place(place_id)['result']}
+        fetched_fields = None
+    else:
+        missing_fields = sorted(set(fields) - set(cached_fields))
+        with metrics.span('places.details'):
+            result = {**result, **get_client().place(place_id, fields=missing_fields)['result']}
+        fetched_fields = sorted(set(cached_fields) | set(missing_fields))
+    details_cache.set(place_id, {'fields': fetched_fields, 'result': result})
+    return result
+
+# A successful key check is reused for this many seconds (0 = for the life of the process)
+API_KEY_CHECK_INTERVAL = float(os.environ.get('PLACES_API_KEY_CHECK_INTERVAL', '0'))
+_api_key_status = None
+_api_key_lock = threading.Lock()
+
+def verify_api_key(force=False):
+    """Verify if the API key is working
+
+    The live check costs a billable search, so a successful result is cached
+    for the process (or API_KEY_CHECK_INTERVAL seconds). Failures are not cached
+    so the app recovers as soon as the key is fixed, and a REQUEST_DENIED from
+    any real call clears the cached result.
+    """
+    global _api_key_status
+    with _api_key_lock:
+        if not force and _api_key_status is not None:
+            checked_at, result = _api_key_status
+            if not API_KEY_CHECK_INTERVAL or time.time() - checked_at < API_KEY_CHECK_INTERVAL:
+                return result
+
+        result = _check_api_key()
+        _api_key_status = (time.time(), result) if result[0] else None
+        return result
+
+def invalidate_api_key_check():
+    """Forget the cached key check so the next verify_api_key runs it again"""
+    global _api_key_status
+    _api_key_status = None
+
+def _note_api_error(e):
+    """Re-trigger key validation when a real call was denied"""
+    if 'REQUEST_DENIED' in str(e):
+        invalidate_api_key_check()
+
+def _check_api_key():
+    """Verify if the API key is working with a live search"""
     try:
-        if not gmaps and not initialize_gmaps():
+        if get_client() is None:
             return False, "Google Maps client not initialized. Please check your API key."
 
         try:
-            # Try a simple place search instead of geocode
-            test_result = gmaps.places("restaurant")
+            # Try a simple place search instead of geocode. A REQUEST_DENIED is
+            # about the key, not the connection, so the client is not rebuilt.
+            with metrics.span('places.api_key_check'):
+                get_client().places("restaurant")
             return True, "API key is valid and working"
         except Exception as e:
-            if 'REQUEST_DENIED' in str(e):
-                # Re-initialize the client to ensure fresh connection
-                if initialize_gmaps():
-                    # Try one more time with a simple search
-                    test_result = gmaps.places("restaurant")
-                    return True, "API key is valid and working"
-            print(f"API verification error: {str(e)}")
+            logger.warning("API verification error: %s", e)
             raise e
     except Exception as e:
         error_msg = str(e)
@@ -51,180 +500,809 @@ def verify_api_key():
             return False, "API key is not authorized. Please ensure Places API is enabled in Google Cloud Console."
         return False, f"API key verification failed: {error_msg}"
 
-def search_businesses(query, location=None):
-    """Search for businesses using Google Places API"""
-    global gmaps
+def search_businesses(query, location=None, max_workers=None, timeout=None, stream=False, outcome=None,
+                      max_age=None):
+    """Search for businesses using Google Places API
+
+    max_workers and timeout control the concurrent place details lookups and
+    default to DETAILS_MAX_WORKERS and DETAILS_TIMEOUT. With stream=True a
+    generator of business rows is returned instead of a DataFrame, see
+    iter_businesses. Results are served from the snapshot when possible. If
+    an outcome dict is given, outcome['complete'] tells whether every page
+    and lookup succeeded. With max_age, cached searches and place details
+    older than max_age seconds are fetched again (0 always searches afresh);
+    the fresh result is still cached.
+    """
+    if stream:
+        return iter_businesses(
+            query, location, max_workers=max_workers, timeout=timeout, outcome=outcome, max_age=max_age
+        )
+
+    outcome = {} if outcome is None else outcome
+    with metrics.span('search.total'):
+        frame = cached_search_frame(query, location, max_age)
+        if frame is not None:
+            outcome['complete'] = True
+            return frame
+
+        places, all_details = [], []
+        for place, place_details in _iter_place_details(query, location, max_workers, timeout, outcome, max_age):
+            places.append(place)
+            all_details.append(place_details)
+        with metrics.span('search.build_frame'):
+            columns = _business_columns(places, all_details)
+            frame = _columns_frame(columns)
+            if outcome.get('complete'):
+                save_snapshot(query, location, frame)
+            return frame
+
+def iter_businesses(query, location=None, max_workers=None, timeout=None, outcome=None, max_age=None):
+    """Yield enriched business rows in ranking order as their details arrive
+
+    Text search pages are fetched on a background thread and each page's
+    details lookups start as soon as the page arrives, so the first rows are
+    ready long before the last page. Closing the generator stops the search.
+    Cached results are yielded straight from the snapshot. outcome is filled
+    in as for search_businesses once the generator is exhausted, and max_age
+    works the same way.
+    """
+    outcome = {} if outcome is None else outcome
+    frame = cached_search_frame(query, location, max_age)
+    if frame is not None:
+        yield from frame.to_dict('records')
+        outcome['complete'] = True
+        return
+
+    rows = []
+    for place, place_details in _iter_place_details(query, location, max_workers, timeout, outcome, max_age):
+        for row in _column_rows(_business_columns([place], [place_details])):
+            rows.append(row)
+            yield row
+    if outcome.get('complete'):
+        save_snapshot(query, location, businesses_from_rows(rows))
+
+def _column_rows(columns):
+    """Row dicts of plain Python values from _business_columns output"""
+    for i in range(len(columns['Place ID'])):
+        yield {
+            name: values[i].item() if isinstance(values, np.ndarray) else values[i]
+            for name, values in columns.items()
+        }
+
+def search_cache_key(query, location=None):
+    """Cache key shared by searches that differ only in case and spacing"""
+    return json.dumps([normalize_query(query), normalize_location(location or '')])
+
+def cached_search_frame(query, location=None, max_age=None):
+    """Snapshot of a cached search in ranking order, or None
+
+    Snapshots older than SEARCH_CACHE_TTL are still returned while a
+    background search refreshes them, unless they are older than max_age.
+    """
+    frame, _, ranking = cached_search_snapshot(query, location, max_age)
+    return None if frame is None else frame.iloc[ranking]
+
+def cached_search_snapshot(query, location=None, max_age=None):
+    """Like cached_search_frame, but returns (frame, fetched_at, ranking) or (None, None, None)
+
+    frame is the memory-mapped snapshot itself, in rating order, and ranking
+    holds its row positions in search ranking order.
+    """
+    frame, fetched_at, ranking = _read_snapshot(query, location)
+    if max_age is not None and frame is not None and time.time() - fetched_at > max_age:
+        metrics.increment('search.snapshot_misses')
+        return None, None, None
+    if frame is None or time.time() - fetched_at > SEARCH_CACHE_TTL + SEARCH_CACHE_STALE_TTL:
+        metrics.increment('search.snapshot_misses')
+        return None, None, None
+
+    metrics.increment('search.snapshot_hits')
+    if time.time() - fetched_at > SEARCH_CACHE_TTL:
+        metrics.increment('search.cache_stale_hits')
+        _refresh_search(query, location)
+    return frame, fetched_at, ranking
+
+def snapshot_path(query, location=None):
+    """Arrow IPC file holding the snapshot for a normalized query and location"""
+    digest = hashlib.sha1(search_cache_key(query, location).encode()).hexdigest()
+    return os.path.join(SNAPSHOT_DIR, f"{digest}.arrow")
+
+def save_snapshot(query, location, frame, fetched_at=None):
+    """Write a businesses frame in ranking order as the Arrow IPC snapshot for query and location
+
+    Rows are stored in rating order, so readers can use the mapped frame
+    with filter_by_rating without sorting (and copying) it; the ranking order
+    is kept as row positions in the metadata.
+    """
+    path = snapshot_path(query, location)
+    try:
+        order = np.argsort(frame['Average Rating'].to_numpy(), kind='stable') if len(frame) else np.array([], int)
+        ranking = np.empty_like(order)
+        ranking[order] = np.arange(len(order))
+        table = pa.Table.from_pandas(frame.iloc[order], preserve_index=False)
+        info = {
+            'query': normalize_query(query),
+            'location': normalize_location(location or ''),
+            'fetched_at': time.time() if fetched_at is None else fetched_at,
+            'ranking': ranking.tolist(),
+        }
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'consumercompass': json.dumps(info).encode()
+        })
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = 0
+        # Atomic so readers in other workers never map a partial file
+        os.replace(tmp_path, path)
+        snapshot_budget.added(os.path.getsize(path), replaced)
+    except (OSError, pa.ArrowException) as e:
+        logger.warning("Error writing search snapshot: %s", e)
+
+def _read_snapshot(query, location=None):
+    """Snapshot frame, fetch time and ranking for query and location, or (None, None, None)"""
+    path = snapshot_path(query, location)
+    try:
+        reader = pa.ipc.open_file(pa.memory_map(path))
+        info = json.loads(reader.schema.metadata[b'consumercompass'])
+        fetched_at, ranking = info['fetched_at'], info['ranking']
+        frame = reader.read_all().to_pandas(split_blocks=True)
+        os.utime(path)
+    except FileNotFoundError:
+        return None, None, None
+    except (OSError, pa.ArrowException, KeyError, TypeError, ValueError) as e:
+        logger.warning("Error reading search snapshot: %s", e)
+        return None, None, None
+
+    if 'Place ID' not in frame.columns:
+        return pd.DataFrame(), fetched_at, []
+    frame.index = pd.Index(frame['Place ID']).rename(None)
+    # Arrow lists arrive as NumPy arrays; the components expect Python lists
+    frame['Review Highlights'] = [list(highlights) for highlights in frame['Review Highlights']]
+    return frame, fetched_at, ranking
+
+def _refresh_search(query, location=None):
+    """Re-run a search on a background thread, at most once at a time per key"""
+    key = search_cache_key(query, location)
+    with _refreshing_lock:
+        if key in _refreshing_searches:
+            return
+        _refreshing_searches.add(key)
+
+    def run():
+        try:
+            rows, outcome = [], {}
+            with request_priority(PRIORITY_PREFETCH):
+                for place, place_details in _iter_place_details(query, location, outcome=outcome):
+                    rows.extend(_column_rows(_business_columns([place], [place_details])))
+            if outcome.get('complete'):
+                save_snapshot(query, location, businesses_from_rows(rows))
+                logger.info("Refreshed cached search: %s", key)
+        except Exception as e:
+            logger.warning("Error refreshing cached search %s: %s", key, e)
+        finally:
+            with _refreshing_lock:
+                _refreshing_searches.discard(key)
+
+    threading.Thread(target=run, daemon=True).start()
+
+def _iter_place_details(query, location=None, max_workers=None, timeout=None, outcome=None, max_age=None):
+    """Yield (search result, place details) pairs in ranking order, skipping failed lookups
+
+    If an outcome dict is given, outcome['complete'] is set once every page
+    and every details lookup succeeded, i.e. the result is safe to cache.
+    Cached place details older than max_age seconds are refetched.
+    """
+    outcome = {} if outcome is None else outcome
+    outcome['complete'] = False
     try:
         # Verify API key first
         is_valid, message = verify_api_key()
         if not is_valid:
-            print(f"API Key Error: {message}")
-            return pd.DataFrame()
+            logger.error("API Key Error: %s", message)
+            return
 
-        # Set up location parameters
-        search_location = None
-        if location:
-            try:
-                # Geocode the location to get coordinates
-                geocode_result = gmaps.geocode(location)
-                if geocode_result:
-                    search_location = {
-                        'lat': geocode_result[0]['geometry']['location']['lat'],
-                        'lng': geocode_result[0]['geometry']['location']['lng']
-                    }
-                    print(f"Using location coordinates: {search_location}")
-            except Exception as e:
-                print(f"Error geocoding location: {str(e)}")
-
-        print(f"Searching for: {query}")
-
-        all_results = []
-        next_page_token = None
-
-        # Split query into keywords for better matching
-        keywords = query.lower().split()
-        base_query = ' '.join(keywords)
-
-        # Get results with pagination
+        search_params = _build_search_params(query, location)
+    except Exception as e:
+        _note_api_error(e)
+        logger.error("Error searching businesses: %s", e)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or DETAILS_MAX_WORKERS)
+    pending = queue.Queue()
+    stopped = threading.Event()
+    producer = threading.Thread(
+        target=metrics.bind(_queue_place_details),
+        args=(search_params, executor, pending, stopped, outcome, max_age),
+        daemon=True
+    )
+    producer.start()
+
+    total_results = 0
+    failed_lookups = 0
+    try:
         while True:
-            try:
-                # Prepare search parameters
-                search_params = {
-                    'query': base_query,
-                    'language': 'en'
-                }
+            item = pending.get()
+            if item is None:
+                break
 
-                if search_location:
-                    search_params['location'] = search_location
-                    search_params['radius'] = 150000  # Increased to 150km radius for wider coverage
+            place, future, clock = item
+            total_results += 1
+            place_details = _wait_for_place_details(place['place_id'], future, timeout, clock)
+            if place_details is None:
+                failed_lookups += 1
+                continue
 
-                if next_page_token:
-                    search_params = {'page_token': next_page_token}
+            yield place, place_details
 
-                print(f"Search parameters: {search_params}")
+        if total_results:
+            logger.info("Total results found: %d", total_results)
+        else:
+            logger.info("No results found in places search")
+        # A location that could not be geocoded silently widens the search
+        geocoded = not normalize_location(location or '') or 'location' in search_params
+        outcome['complete'] = not outcome.get('search_failed') and not failed_lookups and geocoded
+    finally:
+        stopped.set()
+        # Don't block on lookups that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
 
-                # Perform the search
-                places_result = gmaps.places(**search_params)
+def _build_search_params(query, location=None):
+    """Build text search parameters, geocoding the location if one is given"""
+    # Set up location parameters
+    search_location = None
+    if location:
+        try:
+            search_location = geocode_location(location)
+            if search_location:
+                logger.debug("Using location coordinates: %s", search_location)
+        except Exception as e:
+            _note_api_error(e)
+            logger.warning("Error geocoding location: %s", e)
 
-                # Process current page results
-                if places_result.get('results'):
-                    all_results.extend(places_result['results'])
-                    print(f"Found {len(places_result['results'])} results on current page")
+    logger.info("Searching for: %s", query)
 
-                # Check for next page
-                next_page_token = places_result.get('next_page_token')
-                if not next_page_token:
-                    break
+    # Prepare search parameters
+    search_params = {
+        'query': normalize_query(query),
+        'language': 'en'
+    }
 
-                # Wait briefly before requesting next page (API requirement)
-                time.sleep(2)
+    if search_location:
+        search_params['location'] = search_location
+        search_params['radius'] = 150000  # Increased to 150km radius for wider coverage
 
-            except Exception as e:
-                print(f"Error in places search: {str(e)}")
-                break
+    return search_params
 
-        if not all_results:
-            print("No results found in places search")
-            return pd.DataFrame()
+def normalize_query(query):
+    """Lowercased query with runs of whitespace collapsed"""
+    return ' '.join(query.lower().split())
 
-        print(f"Total results found: {len(all_results)}")
+def normalize_location(location):
+    """Canonical form of a location string, so spacing and case variants share a cache entry"""
+    parts = (' '.join(part.split()) for part in location.lower().split(','))
+    return ', '.join(part for part in parts if part)
 
-        # Process all results
-        businesses = []
-        for place in all_results:
-            try:
-                # Get place details for more information
-                place_details = gmaps.place(place['place_id'])['result']
-
-                # Extract business data
-                business = {
-                    'Business Name': place['name'],
-                    'Average Rating': place.get('rating', 0),
-                    'Total Reviews': place.get('user_ratings_total', 0),
-                    'Address': place.get('formatted_address', ''),
-                    'Place ID': place['place_id'],
-                    'Website': place_details.get('website', '')
-                }
-
-                # Get rating distribution if available in details
-                reviews = place_details.get('reviews', [])
-                ratings = [review['rating'] for review in reviews]
-
-                if ratings:
-                    total = len(ratings)
-                    business.update({
-                        '5_star': sum(1 for r in ratings if r == 5) / total * 100,
-                        '4_star': sum(1 for r in ratings if r == 4) / total * 100,
-                        '3_star': sum(1 for r in ratings if r == 3) / total * 100,
-                        '2_star': sum(1 for r in ratings if r == 2) / total * 100,
-                        '1_star': sum(1 for r in ratings if r == 1) / total * 100,
-                    })
-                else:
-                    business.update({
-                        '5_star': 0,
-                        '4_star': 0,
-                        '3_star': 0,
-                        '2_star': 0,
-                        '1_star': 0,
-                    })
-
-                businesses.append(business)
-            except Exception as e:
-                print(f"Error processing place details for {place.get('name', 'unknown')}: {str(e)}")
-                continue
+def geocode_location(location):
+    """Coordinates for a location as {'lat', 'lng'}, or None if it can't be found
+
+    The gazetteer is checked first, then the on-disk geocode cache, and only
+    then the Geocoding API. API errors are raised to the caller and never cached.
+    """
+    key = normalize_location(location)
+    if not key:
+        return None
+
+    coordinates = _load_gazetteer().get(key)
+    if coordinates is not None:
+        metrics.increment('places.geocode.gazetteer_hits')
+        return dict(coordinates)
+
+    coordinates = geocode_cache.get(key)
+    if coordinates is not None:
+        metrics.increment('places.geocode.cache_hits')
+        return coordinates
+
+    metrics.increment('places.geocode.cache_misses')
+    with metrics.span('places.geocode'):
+        geocode_result = get_client().geocode(location)
+    if not geocode_result:
+        return None
+    coordinates = {
+        'lat': geocode_result[0]['geometry']['location']['lat'],
+        'lng': geocode_result[0]['geometry']['location']['lng']
+    }
+    geocode_cache.set(key, coordinates)
+    return coordinates
+
+def _load_gazetteer():
+    """Normalized name -> coordinates from GAZETTEER_PATH, read once per process"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = {}
+            if GAZETTEER_PATH:
+                try:
+                    with open(GAZETTEER_PATH, newline='') as f:
+                        for row in csv.DictReader(f):
+                            name = normalize_location(row.get('name') or '')
+                            if name:
+                                _gazetteer[name] = {'lat': float(row['lat']), 'lng': float(row['lng'])}
+                    logger.info("Loaded %d gazetteer locations", len(_gazetteer))
+                except (OSError, KeyError, TypeError, ValueError) as e:
+                    logger.warning("Error loading gazetteer %s: %s", GAZETTEER_PATH, e)
+        return _gazetteer
 
-        return pd.DataFrame(businesses)
+def _queue_place_details(search_params, executor, pending, stopped, outcome, max_age=None):
+    """Queue a (place, details future, scheduler clock) triple for every search result
 
+    Runs on a background thread so details for page N are fetched while we
+    wait for page N+1. A None sentinel marks the end of the results, and
+    outcome['search_failed'] is set first if a page could not be fetched.
+    """
+    seen = set()
+    try:
+        for page_results in _iter_search_pages(search_params):
+            for place in page_results:
+                if stopped.is_set():
+                    return
+                # Pages occasionally repeat a place; keep its first (best) rank
+                if place['place_id'] in seen:
+                    continue
+                seen.add(place['place_id'])
+                future, clock = _submit_details_lookup(
+                    executor, place['place_id'], SEARCH_DETAILS_FIELDS, place, max_age
+                )
+                pending.put((place, future, clock))
     except Exception as e:
-        print(f"Error searching businesses: {str(e)}")
+        # Submitting after the consumer shut the executor down is expected
+        if not stopped.is_set():
+            _note_api_error(e)
+            outcome['search_failed'] = True
+            logger.error("Error in places search: %s", e)
+    finally:
+        pending.put(None)
+
+def build_business_frame(places, all_details):
+    """Build the businesses DataFrame from search results and their place details
+
+    Columns are assembled directly with fixed dtypes rather than from a list
+    of row dicts, and every rating distribution comes from one NumPy pass.
+    The frame is indexed by place ID so components can look businesses up
+    with data.loc instead of scanning the name column.
+    """
+    return _columns_frame(_business_columns(places, all_details))
+
+def _columns_frame(columns):
+    """DataFrame from _business_columns output, indexed by place ID"""
+    if not columns['Place ID']:
+        return pd.DataFrame()
+    return pd.DataFrame(columns, index=columns['Place ID'])
+
+def businesses_from_rows(rows):
+    """Build a businesses DataFrame from streamed rows, indexed by place ID"""
+    if not rows:
         return pd.DataFrame()
+    data = pd.DataFrame(rows)
+    data.index = data['Place ID'].tolist()
+    return data
+
+def _business_columns(places, all_details):
+    """Extract business columns, skipping places whose data is malformed"""
+    rows = []
+    for place, place_details in zip(places, all_details):
+        try:
+            # Extract business data
+            rows.append((
+                place['name'],
+                place.get('rating', 0),
+                place.get('user_ratings_total', 0),
+                place.get('formatted_address', ''),
+                place['place_id'],
+                place_details.get('website', ''),
+                [review['rating'] for review in place_details.get('reviews', [])],
+                # Highlights come from the reviews we already have in hand
+                review_highlights(place_details.get('reviews', []))
+            ))
+        except Exception as e:
+            logger.warning("Error processing place details for %s: %s", place.get('name', 'unknown'), e)
+
+    names, ratings, totals, addresses, place_ids, websites, review_ratings, highlights = (
+        [list(column) for column in zip(*rows)] if rows else [[] for _ in range(8)]
+    )
+
+    columns = {
+        'Business Name': names,
+        'Average Rating': np.asarray(ratings, dtype=np.float64),
+        'Total Reviews': np.asarray(totals, dtype=np.int64),
+        'Address': addresses,
+        'Place ID': place_ids,
+        'Website': websites,
+    }
+
+    # Get rating distribution if available in details
+    distributions = rating_distributions(review_ratings)
+    for star, column in enumerate(RATING_COLUMNS):
+        columns[column] = distributions[:, star]
+
+    columns['Review Highlights'] = highlights
+    return columns
+
+def rating_distributions(review_ratings):
+    """Percentage of 5, 4, 3, 2 and 1 star reviews for each place
+
+    review_ratings holds one list of review ratings per place. All ratings
+    are flattened into a single array tagged with their place index and
+    counted with one bincount, giving an (n_places, 5) array ordered like
+    RATING_COLUMNS. Places without reviews get all zeros.
+    """
+    n_places = len(review_ratings)
+    counts = np.fromiter((len(ratings) for ratings in review_ratings), dtype=np.int64, count=n_places)
+    flat = np.fromiter(
+        (rating for ratings in review_ratings for rating in ratings),
+        dtype=np.float64,
+        count=int(counts.sum())
+    )
+    place_index = np.repeat(np.arange(n_places), counts)
+
+    # Only whole 1-5 star ratings are binned, but every review counts towards the total
+    valid = np.isin(flat, (1, 2, 3, 4, 5))
+    bins = place_index[valid] * 5 + (5 - flat[valid].astype(np.int64))
+    histogram = np.bincount(bins, minlength=n_places * 5).reshape(n_places, 5)
+
+    percentages = np.zeros((n_places, 5), dtype=np.float64)
+    np.divide(histogram * 100.0, counts[:, None], out=percentages, where=counts[:, None] > 0)
+    return percentages
+
+def _iter_search_pages(search_params):
+    """Yield the results of each text search page, following next_page_token
+
+    API errors are raised so the caller can tell a partial result from a complete one.
+    """
+    next_page_token = None
+    while True:
+        if next_page_token:
+            logger.debug("Search parameters: {'page_token': '%s'}", next_page_token)
+            places_result = _fetch_next_page(next_page_token)
+        else:
+            logger.debug("Search parameters: %s", search_params)
+            with metrics.span('places.text_search'):
+                places_result = get_client().places(**search_params)
+
+        # Process current page results
+        page_results = places_result.get('results', [])
+        if page_results:
+            logger.debug("Found %d results on current page", len(page_results))
+            yield page_results
+
+        # Check for next page
+        next_page_token = places_result.get('next_page_token')
+        if not next_page_token:
+            return
+
+def _fetch_next_page(page_token):
+    """Request the next results page, backing off while the token is not yet valid
+
+    A fresh next_page_token is rejected with INVALID_REQUEST for a short, variable
+    time, so poll with a growing delay instead of always sleeping the worst case.
+    """
+    delay = NEXT_PAGE_INITIAL_DELAY
+    for attempt in range(NEXT_PAGE_MAX_ATTEMPTS):
+        with metrics.span('places.next_page_wait'):
+            time.sleep(delay)
+        try:
+            with metrics.span('places.text_search'):
+                return get_client().places(page_token=page_token)
+        except googlemaps.exceptions.ApiError as e:
+            if e.status != 'INVALID_REQUEST' or attempt == NEXT_PAGE_MAX_ATTEMPTS - 1:
+                raise
+            delay *= NEXT_PAGE_BACKOFF
+
+def _submit_place_details(executor, place_ids, fields=None):
+    """Start place details lookups on executor, returning a (future, clock) pair per place"""
+    return [_submit_details_lookup(executor, place_id, fields) for place_id in place_ids]
+
+def _submit_details_lookup(executor, place_id, *args):
+    """Start one get_place_details call, with a clock of its time in the scheduler"""
+    clock = SchedulerClock()
+    future = executor.submit(metrics.bind(run_with_clock), clock, get_place_details, place_id, *args)
+    return future, clock
+
+def _wait_for_place_details(place_id, future, timeout=None, clock=None):
+    """Wait for one place details future, returning None if the lookup failed
+
+    The timeout counts time in Places calls only: time the lookup spends
+    queued for a token or backing off from quota errors, as recorded on its
+    clock, extends it, so rate limiting never drops a row.
+    """
+    timeout = DETAILS_TIMEOUT if timeout is None else timeout
+    started = time.monotonic()
+    try:
+        with metrics.span('search.details_wait'):
+            while True:
+                allowed = timeout + (clock.waited() if clock else 0.0)
+                try:
+                    return future.result(timeout=max(0.0, allowed - (time.monotonic() - started)))
+                except FutureTimeoutError:
+                    # Keep waiting if the scheduler held the lookup back meanwhile
+                    if clock is None or clock.waited() + timeout <= time.monotonic() - started:
+                        raise
+    except Exception as e:
+        _note_api_error(e)
+        logger.warning("Error processing place details for %s: %s", place_id, str(e) or type(e).__name__)
+        return None
+
+def fetch_place_details(place_ids, fields=None, max_workers=None, timeout=None):
+    """Fetch place details for several places concurrently
+
+    fields limits each lookup as in get_place_details. Results are returned in the same order as place_ids. Places whose lookup
+    fails or exceeds the timeout are returned as None so callers can skip them.
+    """
+    if not place_ids:
+        return []
+
+    max_workers = max_workers or DETAILS_MAX_WORKERS
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(place_ids)))
+    try:
+        lookups = _submit_place_details(executor, place_ids, fields)
+        return [
+            _wait_for_place_details(place_id, future, timeout, clock)
+            for place_id, (future, clock) in zip(place_ids, lookups)
+        ]
+    finally:
+        # Don't block on lookups that timed out
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def sort_by_rating(data):
+    """Businesses in ascending Average Rating order, ready for filter_by_rating"""
+    if data.empty or data['Average Rating'].is_monotonic_increasing:
+        return data
+    return data.sort_values('Average Rating', kind='stable')
+
+def filter_by_rating(data, min_rating):
+    """Return the businesses rated at least min_rating
+
+    On a frame from sort_by_rating the cut-off is found by binary search and
+    the result is a slice of data, so no rows are copied. Unsorted frames
+    are sorted first.
+    """
+    if data.empty:
+        return data
+    data = sort_by_rating(data)
+    start = np.searchsorted(data['Average Rating'].to_numpy(), min_rating, side='left')
+    return data.iloc[start:]
+
+def compare_businesses(data, place_ids):
+    """Ranking table for several businesses, computed in one pass over their rows
+
+    Businesses are ranked by a weighted rating, a Bayesian average that pulls
+    ratings backed by few reviews towards the group mean (weighted by the
+    group's median review count), with more reviews breaking ties.
+    """
+    rows = data.loc[list(place_ids)]
+    ratings = rows['Average Rating'].to_numpy(dtype=np.float64)
+    totals = rows['Total Reviews'].to_numpy(dtype=np.float64)
+    distributions = rows[RATING_COLUMNS].to_numpy(dtype=np.float64)
+
+    prior_weight = np.median(totals) if len(totals) else 0.0
+    prior_rating = ratings.mean() if len(ratings) else 0.0
+    weights = totals + prior_weight
+    weighted = ratings.copy()
+    np.divide(totals * ratings + prior_weight * prior_rating, weights, out=weighted, where=weights > 0)
+
+    order = np.lexsort((-totals, -weighted))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(1, len(order) + 1)
+
+    table = pd.DataFrame({
+        'Rank': ranks,
+        'Business Name': rows['Business Name'].to_numpy(),
+        'Weighted Rating': weighted,
+        'Average Rating': ratings,
+        'Total Reviews': rows['Total Reviews'].to_numpy(),
+        'Positive %': distributions[:, :2].sum(axis=1),
+        'Negative %': distributions[:, 3:].sum(axis=1),
+    }, index=rows.index)
+    return table.iloc[order]
 
 def get_review_highlights(place_id):
     """Get review highlights for a specific business"""
-    global gmaps
     try:
-        if not gmaps and not initialize_gmaps():
+        if get_client() is None:
             return ["Error: Google Maps client not initialized"]
 
-        place_details = gmaps.place(place_id)['result']
-        reviews = place_details.get('reviews', [])
+        with request_priority(PRIORITY_HIGHLIGHTS):
+            place_details = get_place_details(place_id, fields=HIGHLIGHT_FIELDS)
+        return review_highlights(place_details.get('reviews', []))
+    except Exception as e:
+        _note_api_error(e)
+        logger.warning("Error getting review highlights: %s", e)
+        return ["Error fetching review highlights"]
+
+def get_review_highlights_batch(place_ids, max_workers=None, timeout=None):
+    """Get review highlights for many businesses at once
+
+    Details are fetched concurrently like in search_businesses. Returns a
+    dict mapping each place ID to its highlights.
+    """
+    if get_client() is None:
+        return {place_id: ["Error: Google Maps client not initialized"] for place_id in place_ids}
 
-        # Sort reviews by rating and get the top 3 most helpful
-        sorted_reviews = sorted(reviews, key=lambda x: (x.get('rating', 0), x.get('time', 0)), reverse=True)
-        highlights = [review['text'][:200] + '...' if len(review['text']) > 200 else review['text']
-                     for review in sorted_reviews[:3]]
+    with request_priority(PRIORITY_HIGHLIGHTS):
+        all_details = fetch_place_details(
+            list(place_ids),
+            fields=HIGHLIGHT_FIELDS,
+            max_workers=max_workers,
+            timeout=timeout
+        )
+    return {
+        place_id: (
+            review_highlights(place_details.get('reviews', []))
+            if place_details is not None else ["Error fetching review highlights"]
+        )
+        for place_id, place_details in zip(place_ids, all_details)
+    }
+
+def review_highlights(reviews):
+    """Pick the top 3 reviews and truncate them for display"""
+    # Sort reviews by rating and get the top 3 most helpful
+    sorted_reviews = sorted(reviews, key=lambda x: (x.get('rating', 0), x.get('time', 0)), reverse=True)
+    highlights = [review['text'][:200] + '...' if len(review['text']) > 200 else review['text']
+                 for review in sorted_reviews[:3]]
+
+    return highlights if highlights else ["No review highlights available"]
+
+# After a search the top results are warmed in the background. The shared
+# executor caps in-flight prefetches across all sessions so they never crowd
+# out foreground lookups.
+PREFETCH_TOP_N = int(os.environ.get('PLACES_PREFETCH_TOP_N', '5'))
+PREFETCH_MAX_IN_FLIGHT = int(os.environ.get('PLACES_PREFETCH_MAX_IN_FLIGHT', '2'))
+_prefetch_executor = None
+_prefetching = set()
+_prefetch_lock = threading.Lock()
+
+def prefetch_businesses(place_ids):
+    """Warm the details and photo caches for place_ids in the background
+
+    Places that are already queued are skipped. Returns the futures of the
+    newly queued prefetches.
+    """
+    global _prefetch_executor
+    futures = []
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=PREFETCH_MAX_IN_FLIGHT, thread_name_prefix='prefetch'
+            )
+        for place_id in place_ids:
+            if place_id in _prefetching:
+                continue
+            _prefetching.add(place_id)
+            futures.append(_prefetch_executor.submit(_prefetch_business, place_id))
+    return futures
 
-        return highlights if highlights else ["No review highlights available"]
+def _prefetch_business(place_id):
+    """Fetch what a comparison of place_id needs: its highlights and photo"""
+    try:
+        with metrics.span('prefetch.business'), request_priority(PRIORITY_PREFETCH):
+            get_place_details(place_id, fields=HIGHLIGHT_FIELDS + IMAGE_FIELDS)
+            get_business_image(place_id)
     except Exception as e:
-        print(f"Error getting review highlights: {str(e)}")
-        return ["Error fetching review highlights"]
+        _note_api_error(e)
+        logger.debug("Error prefetching %s: %s", place_id, e)
+    finally:
+        with _prefetch_lock:
+            _prefetching.discard(place_id)
+
+def get_business_images_batch(place_ids, max_workers=None):
+    """Get thumbnails for many businesses at once, as a dict of place ID to bytes or None"""
+    place_ids = list(place_ids)
+    if not place_ids:
+        return {}
+    max_workers = max_workers or DETAILS_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(place_ids))) as executor:
+        images = executor.map(metrics.bind(get_business_image), place_ids)
+        return dict(zip(place_ids, images))
 
 def get_business_image(place_id):
-    """Get the primary photo for a business using its place_id"""
-    global gmaps
+    """Get the primary photo for a business as thumbnail JPEG bytes
+
+    Photos are downloaded once through the Places client and served from the
+    on-disk thumbnail cache afterwards, so the API key never reaches the page.
+    """
     try:
-        if not gmaps and not initialize_gmaps():
-            return None
-            
-        # Get place details with photo field
-        place_details = gmaps.place(place_id, fields=['photo'])['result']
-        photos = place_details.get('photos', [])
-        
-        if not photos:
-            print(f"No photos available for place_id: {place_id}")
-            return None
-            
-        # Get the first (primary) photo reference
-        photo_reference = photos[0].get('photo_reference')
-        if not photo_reference:
-            print(f"No photo reference found for place_id: {place_id}")
+        if get_client() is None:
             return None
             
-        # Get the photo URL from the API (max width 400 for better display)
-        # This URL will work directly in an img tag
-        photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key={os.environ.get('GOOGLE_PLACES_API_KEY')}"
-        return photo_url
+        with request_priority(PRIORITY_HIGHLIGHTS):
+            # Get place details with photo field
+            place_details = get_place_details(place_id, fields=IMAGE_FIELDS)
+            photos = place_details.get('photos', [])
+
+            if not photos:
+                logger.debug("No photos available for place_id: %s", place_id)
+                return None
+
+            # Get the first (primary) photo reference
+            photo_reference = photos[0].get('photo_reference')
+            if not photo_reference:
+                logger.debug("No photo reference found for place_id: %s", place_id)
+                return None
+
+            return get_photo_thumbnail(photo_reference)
         
     except Exception as e:
-        print(f"Error getting business image: {str(e)}")
-        return None
\ No newline at end of file
+        _note_api_error(e)
+        logger.warning("Error getting business image: %s", e)
+        return None
+
+def get_photo_thumbnail(photo_reference):
+    """Return thumbnail bytes for a photo reference, downloading it on first use"""
+    digest = photo_index.get(photo_reference)
+    if digest:
+        thumbnail = _read_photo(digest)
+        if thumbnail is not None:
+            metrics.increment('places.photo.cache_hits')
+            return thumbnail
+
+    # Get the photo from the API (max width 400 for better display)
+    metrics.increment('places.photo.cache_misses')
+    with metrics.span('places.photo'):
+        photo = b''.join(get_client().places_photo(photo_reference, max_width=PHOTO_MAX_WIDTH))
+    thumbnail = _make_thumbnail(photo)
+    digest = _write_photo(thumbnail)
+    photo_index.set(photo_reference, digest)
+    return thumbnail
+
+def _make_thumbnail(photo):
+    """Shrink a photo to fit PHOTO_MAX_WIDTH and re-encode it as JPEG"""
+    # Pillow is only needed once a photo is downloaded
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(photo)) as image:
+            image = image.convert('RGB')
+            image.thumbnail((PHOTO_MAX_WIDTH, PHOTO_MAX_WIDTH))
+            output = io.BytesIO()
+            image.save(output, format='JPEG', quality=PHOTO_JPEG_QUALITY, optimize=True)
+            return output.getvalue()
+    except Exception as e:
+        # Keep the original bytes if Pillow cannot decode them
+        logger.warning("Error creating thumbnail: %s", e)
+        return photo
+
+def _photo_path(digest):
+    """Location of a cached thumbnail, sharded by the first two hash characters"""
+    return os.path.join(PHOTO_CACHE_DIR, digest[:2], f"{digest}.jpg")
+
+def _read_photo(digest):
+    """Read a cached thumbnail, marking it as recently used"""
+    path = _photo_path(digest)
+    try:
+        with open(path, 'rb') as f:
+            thumbnail = f.read()
+        os.utime(path)
+        return thumbnail
+    except OSError:
+        return None
+
+def _write_photo(thumbnail):
+    """Store a thumbnail under its content hash and return the hash"""
+    digest = hashlib.sha256(thumbnail).hexdigest()
+    path = _photo_path(digest)
+    try:
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(thumbnail)
+            # Atomic so other workers never see a partial file
+            os.replace(tmp_path, path)
+            photo_budget.added(len(thumbnail))
+    except OSError as e:
+        logger.warning("Error writing photo cache: %s", e)
+    return digest
@@ -1,7 +1,18 @@
+import logging
+import os
+import threading
 import streamlit as st
-import pandas as pd
-from data import search_businesses, get_review_highlights, verify_api_key
-from components import display_comparison
+import metrics
+
+# Per-page search progress is logged at DEBUG; raise the level to quiet it under load
+logging.basicConfig(
+    level=os.environ.get('CONSUMERCOMPASS_LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Everything this rerun does is timed into its own trace for the debug panel
+rerun_trace = metrics.start_trace('rerun')
 
 # Page configuration
 st.set_page_config(
@@ -49,13 +60,30 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# App title and description
+st.title("🧭 ConsumerCompass")
+st.markdown("""
+Compare ratings and reviews between different businesses to make informed decisions.
+Search for businesses and select two to compare.
+""")
+
+# The app modules are imported after the title is drawn, so the first session
+# on a fresh worker sees the page while they load
+import pandas as pd
+from data import (
+    search_businesses, search_cache_key, cached_search_snapshot, businesses_from_rows, filter_by_rating,
+    get_review_highlights, verify_api_key, prefetch_businesses, PREFETCH_TOP_N
+)
+from components import display_comparison, display_multi_comparison
+from utils import warm_figures
+from results import shared_results, private_results
+
 # Initialize session state
-if 'data' not in st.session_state:
-    st.session_state.data = pd.DataFrame()
-if 'businesses' not in st.session_state:
-    st.session_state.businesses = []
-if 'business_lookup' not in st.session_state:
-    st.session_state.business_lookup = {}
+if 'results' not in st.session_state:
+    # A handle on the current search results, usually shared with other sessions
+    st.session_state.results = private_results(pd.DataFrame())
+if 'search_job' not in st.session_state:
+    st.session_state.search_job = None
 if 'screen_width' not in st.session_state:
     st.session_state.screen_width = 1200  # Default to desktop
 
@@ -93,13 +121,6 @@ if screen_width_data.text_input("", key="screen_width_data", label_visibility="c
     except:
         pass
 
-# App title and description
-st.title("🧭 ConsumerCompass")
-st.markdown("""
-Compare ratings and reviews between different businesses to make informed decisions.
-Search for businesses and select two to compare.
-""")
-
 # Verify API key status
 api_valid, api_message = verify_api_key()
 if not api_valid:
@@ -124,108 +145,295 @@ else:  # Desktop view - side by side
     with col2:
         location = st.text_input("Location (optional)", placeholder="e.g., San Francisco")
 
-@st.cache_data(ttl=300)
-def perform_business_search(query, location):
-    """Perform business search with caching and detailed error handling"""
+# How often the results section refreshes while a search is still streaming in
+SEARCH_POLL_INTERVAL = 0.5
+
+def search_error_message(error):
+    """Turn a search exception into a user-facing message"""
+    error_msg = str(error)
+    if 'REQUEST_DENIED' in error_msg:
+        return "API access denied. Please ensure the Places API is enabled and the API key is valid."
+    return f"Error searching businesses: {error_msg}"
+
+def start_business_search(query, location):
+    """Run a streaming business search on a background thread
+
+    Rows are appended to the returned job as they arrive so the results
+    section can grow the table and selection lists while the search runs.
+    A search another session already ran, or with a snapshot on disk, is
+    served without a thread.
+    """
+    job = {
+        'key': search_cache_key(query, location), 'rows': [], 'frame': None, 'fetched_at': None,
+        'ranking': None, 'shared': None, 'done': False, 'complete': False, 'error': None, 'reported': False,
+        'cancelled': False, 'trace': None
+    }
+    # Session state is not available on the search thread
+    is_mobile = st.session_state.get('screen_width', 1200) <= 768
+
+    job['shared'] = shared_results.get(job['key'])
+    if job['shared'] is not None:
+        job['done'] = True
+        return job
+
+    job['frame'], job['fetched_at'], job['ranking'] = cached_search_snapshot(query, location)
+    if job['frame'] is not None:
+        job['done'] = True
+        top_results = job['frame'].iloc[job['ranking'][:PREFETCH_TOP_N]]
+        threading.Thread(target=prefetch_top_results, args=(top_results, is_mobile), daemon=True).start()
+        return job
+
+    def run():
+        job['trace'] = metrics.start_trace('search')
+        outcome = {}
+        try:
+            with metrics.span('search.total'):
+                for business in search_businesses(query, location, stream=True, outcome=outcome):
+                    if job['cancelled']:
+                        break
+                    job['rows'].append(business)
+        except Exception as e:
+            job['error'] = search_error_message(e)
+        finally:
+            job['complete'] = bool(outcome.get('complete')) and not job['cancelled']
+            job['done'] = True
+        if not job['cancelled'] and job['rows']:
+            prefetch_top_results(businesses_from_rows(job['rows'][:PREFETCH_TOP_N]), is_mobile)
+
+    threading.Thread(target=run, daemon=True).start()
+    return job
+
+def prefetch_top_results(data, is_mobile):
+    """Warm caches and figures for the businesses users most often compare"""
     try:
-        data = search_businesses(query, location)
-        if data.empty:
-            return None, "No businesses found. Please try a different search term or location."
-        return data, None
+        prefetch_businesses(list(data.index))
+        with metrics.span('prefetch.figures'):
+            warm_figures(data, list(data.index), is_mobile)
     except Exception as e:
-        error_msg = str(e)
-        if 'REQUEST_DENIED' in error_msg:
-            return None, "API access denied. Please ensure the Places API is enabled and the API key is valid."
-        return None, f"Error searching businesses: {error_msg}"
+        logger.warning("Error prefetching results: %s", e)
+
+def sync_search_results():
+    """Point session state at the latest search results
+
+    Rows streaming in are shown from a private frame; once the search is
+    complete (or came from a snapshot) the session switches to the shared copy.
+    """
+    job = st.session_state.search_job
+    if job is None or job['shared'] is st.session_state.results:
+        return
+
+    if job['shared'] is None and job['frame'] is not None:
+        # A stale snapshot keeps its fetch time, so it is not shared as fresh
+        job['shared'] = shared_results.share(job['key'], job['frame'], job['fetched_at'], job['ranking'])
+    elif job['shared'] is None and job['complete']:
+        job['shared'] = shared_results.share(job['key'], businesses_from_rows(job['rows']))
+    if job['shared'] is not None:
+        set_search_results(job['shared'])
+        return
+
+    rows = job['rows'][:]
+    if len(rows) != len(st.session_state.results.data):
+        set_search_results(private_results(businesses_from_rows(rows)))
+
+def set_search_results(results):
+    """Swap the session's results handle, releasing the previous one"""
+    st.session_state.results.release()
+    st.session_state.results = results
+
+def show_search_status():
+    """Show search progress, then the final outcome once"""
+    job = st.session_state.search_job
+    if job is None:
+        return
+
+    if not job['done']:
+        st.info(f"Searching for businesses... {len(st.session_state.results.data)} found so far")
+    elif not job['reported']:
+        job['reported'] = True
+        if job['error']:
+            st.error(job['error'])
+        elif st.session_state.results.data.empty:
+            st.error("No businesses found. Please try a different search term or location.")
+        else:
+            st.success(f"Found {len(st.session_state.results.data)} businesses!")
 
 # Update the search button logic
 if st.button("Search"):
     if not search_query:
         st.warning("Please enter a search term")
     else:
-        with st.spinner("Searching for businesses..."):
-            data, error = perform_business_search(search_query, location)
-            if error:
-                st.error(error)
-            else:
-                st.session_state.data = data
-                # Store original business names for lookup
-                st.session_state.business_lookup = {
-                    f"{name} - {addr}": name 
-                    for name, addr in zip(data['Business Name'], data['Address'])
-                }
-                st.session_state.businesses = list(st.session_state.business_lookup.keys())
-                st.success(f"Found {len(data)} businesses!")
-
-# Business selection - responsive layout based on screen width
-if not st.session_state.data.empty:
-    # Container with styling for selection area
-    st.markdown("""
-    <div style="background-color: #f8f9fa; padding: 15px; border-radius: 10px; margin: 15px 0;">
-        <h3 style="margin-top: 0; text-align: center;">Select Businesses to Compare</h3>
-    </div>
-    """, unsafe_allow_html=True)
-    
+        if st.session_state.search_job is not None:
+            st.session_state.search_job['cancelled'] = True
+        set_search_results(private_results(pd.DataFrame()))
+        st.session_state.search_job = start_business_search(search_query, location)
+
+search_running = st.session_state.search_job is not None and not st.session_state.search_job['done']
+
+# Comparison modes: the classic side-by-side pair, or a ranking of several businesses
+PAIR_MODE = "Two businesses"
+MULTI_MODE = "Several businesses"
+
+def select_business_pair():
+    """Two selectboxes for a pairwise comparison; returns the chosen place IDs"""
     if screen_width <= 768:  # Mobile view - stack vertically
         # First business
         business1_label = st.selectbox(
             "Select first business",
-            options=st.session_state.businesses,
+            options=st.session_state.results.labels,
             key='business1_label'
         )
-        business1 = st.session_state.business_lookup.get(business1_label) if business1_label else None
-        
+        place_id1 = st.session_state.results.lookup.get(business1_label) if business1_label else None
+
         # Second business - exclude first selection
-        remaining_businesses = [b for b in st.session_state.businesses if b != business1_label]
+        remaining_businesses = [b for b in st.session_state.results.labels if b != business1_label]
         business2_label = st.selectbox(
             "Select second business",
             options=remaining_businesses,
             key='business2_label'
         )
-        business2 = st.session_state.business_lookup.get(business2_label) if business2_label else None
-    
+        place_id2 = st.session_state.results.lookup.get(business2_label) if business2_label else None
+
     else:  # Desktop view - side by side
         col1, col2 = st.columns(2)
         with col1:
             business1_label = st.selectbox(
                 "Select first business",
-                options=st.session_state.businesses,
+                options=st.session_state.results.labels,
                 key='business1_label'
             )
-            business1 = st.session_state.business_lookup.get(business1_label) if business1_label else None
-        
+            place_id1 = st.session_state.results.lookup.get(business1_label) if business1_label else None
+
         with col2:
             # Ensure second dropdown excludes the first selection
-            remaining_businesses = [b for b in st.session_state.businesses if b != business1_label]
+            remaining_businesses = [b for b in st.session_state.results.labels if b != business1_label]
             business2_label = st.selectbox(
                 "Select second business",
                 options=remaining_businesses,
                 key='business2_label'
             )
-            business2 = st.session_state.business_lookup.get(business2_label) if business2_label else None
+            place_id2 = st.session_state.results.lookup.get(business2_label) if business2_label else None
 
-    # Add a filter for minimum rating
+    return [place_id1, place_id2]
+
+def hidden_businesses(filtered_data, *place_ids):
+    """Selected place IDs that the rating filter removed"""
+    return [place_id for place_id in place_ids if place_id and place_id not in filtered_data.index]
+
+@st.fragment
+def rating_filter(place_ids):
+    """Minimum rating slider, rerun on its own while it moves
+
+    The comparison below only changes when a selected business crosses the
+    threshold, so only then is the whole app rerun to redraw it.
+    """
     min_rating = st.slider(
         "Filter by minimum rating",
         min_value=1.0,
         max_value=5.0,
         value=1.0,
-        step=0.5
+        step=0.5,
+        key='min_rating'
     )
+    with metrics.span('render.filter'):
+        filtered_data = filter_by_rating(st.session_state.results.data, min_rating)
+    if hidden_businesses(filtered_data, *place_ids) != st.session_state.hidden_businesses:
+        st.rerun()
 
-    # Display comparison if both businesses are selected
-    if business1 and business2:
-        # Filter data based on minimum rating
-        filtered_data = st.session_state.data[
-            st.session_state.data['Average Rating'] >= min_rating
-        ].copy()
+@st.fragment(run_every=SEARCH_POLL_INTERVAL if search_running else None)
+def search_results_section():
+    """Selection and comparison area, refreshed in place while results stream in"""
+    sync_search_results()
+    if search_running and st.session_state.search_job['done']:
+        # Search finished; rerun the whole app once to stop polling
+        st.rerun()
+    show_search_status()
 
-        # Display comparison
-        display_comparison(filtered_data, business1, business2)
+    # Business selection - responsive layout based on screen width
+    if not st.session_state.results.data.empty:
+        # Container with styling for selection area
+        st.markdown("""
+        <div style="background-color: #f8f9fa; padding: 15px; border-radius: 10px; margin: 15px 0;">
+            <h3 style="margin-top: 0; text-align: center;">Select Businesses to Compare</h3>
+        </div>
+        """, unsafe_allow_html=True)
+    
+        comparison_mode = st.radio(
+            "Comparison mode",
+            [PAIR_MODE, MULTI_MODE],
+            horizontal=True,
+            key='comparison_mode'
+        )
+        if comparison_mode == MULTI_MODE:
+            selected_labels = st.multiselect(
+                "Select businesses to compare",
+                options=st.session_state.results.labels,
+                key='multi_business_labels'
+            )
+            place_ids = [st.session_state.results.lookup[label] for label in selected_labels]
+        else:
+            place_ids = select_business_pair()
+
+        # Filter data based on minimum rating; the slider itself is drawn by rating_filter
+        with metrics.span('render.filter'):
+            filtered_data = filter_by_rating(st.session_state.results.data, st.session_state.get('min_rating', 1.0))
+        st.session_state.hidden_businesses = hidden_businesses(filtered_data, *place_ids)
+        rating_filter(place_ids)
+
+        # Display comparison once enough businesses are selected
+        if comparison_mode == MULTI_MODE:
+            if len(place_ids) >= 2:
+                display_multi_comparison(filtered_data, st.session_state.results.data, place_ids)
+            else:
+                st.info("Please select at least two businesses to compare")
+        elif all(place_ids):
+            display_comparison(filtered_data, st.session_state.results.data, *place_ids)
+        else:
+            st.info("Please select two businesses to compare")
     else:
-        st.info("Please select two businesses to compare")
-else:
-    st.info("Search for businesses to start comparing")
+        st.info("Search for businesses to start comparing")
+
+search_results_section()
+
+def show_debug_panel():
+    """Timing breakdown for this rerun and the latest search, with exports"""
+    search_job = st.session_state.search_job
+    search_trace = search_job['trace'] if search_job else None
+
+    with st.expander("⏱️ Performance details", expanded=False):
+        for title, trace in (("This rerun", rerun_trace), ("Latest search", search_trace)):
+            if trace is None:
+                continue
+            st.markdown(f"**{title}**")
+            summary = trace.summary()
+            if summary:
+                st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
+            if trace.counters:
+                st.json(dict(trace.counters), expanded=False)
+
+        stats = shared_results.stats()
+        st.caption(
+            f"Shared results: {stats['entries']} searches, {stats['held']} in use by {stats['handles']} sessions"
+        )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "Download JSON",
+                metrics.export_json(rerun_trace, search_trace),
+                file_name="consumercompass-metrics.json",
+                mime="application/json"
+            )
+        with col2:
+            st.download_button(
+                "Download Prometheus",
+                metrics.export_prometheus(),
+                file_name="consumercompass-metrics.prom",
+                mime="text/plain"
+            )
+
+# The debug panel is shown with ?debug=1 or CONSUMERCOMPASS_DEBUG=1
+if st.query_params.get('debug') == '1' or os.environ.get('CONSUMERCOMPASS_DEBUG') == '1':
+    show_debug_panel()
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,194 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the Prometheus histogram buckets for span durations
+SPAN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_trace = contextvars.ContextVar('consumercompass_trace', default=None)
+
+class Trace:
+    """Spans and counters recorded during one Streamlit rerun or background job"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.spans = []
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add_span(self, name, started_at, duration, labels):
+        with self._lock:
+            self.spans.append({
+                'name': name,
+                'start_ms': (started_at - self.started_at) * 1000,
+                'duration_ms': duration * 1000,
+                'labels': labels,
+                'thread': threading.current_thread().name,
+            })
+
+    def increment(self, name, value):
+        with self._lock:
+            self.counters[name] += value
+
+    def summary(self):
+        """Per-span totals, slowest first"""
+        with self._lock:
+            totals = {}
+            for span in self.spans:
+                total = totals.setdefault(span['name'], {'span': span['name'], 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+                total['count'] += 1
+                total['total_ms'] += span['duration_ms']
+                total['max_ms'] = max(total['max_ms'], span['duration_ms'])
+        return sorted(totals.values(), key=lambda total: total['total_ms'], reverse=True)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'started_at': self.started_at,
+                'spans': list(self.spans),
+                'counters': dict(self.counters),
+            }
+
+class Registry:
+    """Process-wide span histograms and counters for Prometheus export"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.span_counts = defaultdict(int)
+        self.span_sums = defaultdict(float)
+        self.span_buckets = defaultdict(lambda: [0] * len(SPAN_BUCKETS))
+        self.counters = defaultdict(float)
+        self.gauges = {}
+
+    def observe(self, name, duration):
+        with self._lock:
+            self.span_counts[name] += 1
+            self.span_sums[name] += duration
+            buckets = self.span_buckets[name]
+            for i, bound in enumerate(SPAN_BUCKETS):
+                if duration <= bound:
+                    buckets[i] += 1
+
+    def increment(self, name, value):
+        with self._lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'spans': {
+                    name: {'count': self.span_counts[name], 'sum_seconds': self.span_sums[name]}
+                    for name in self.span_counts
+                },
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+            }
+
+registry = Registry()
+
+def start_trace(name):
+    """Start a new trace and make it current for this thread's context"""
+    trace = Trace(name)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace():
+    return _current_trace.get()
+
+def bind(fn):
+    """Wrap fn so it records into the caller's trace when run on another thread"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # Each call gets its own copy; one Context cannot be entered twice at once
+        return context.copy().run(fn, *args, **kwargs)
+
+    return run
+
+@contextmanager
+def span(name, **labels):
+    """Time the enclosed block into the current trace and the process registry"""
+    started_at = time.time()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        registry.observe(name, duration)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(name, started_at, duration, labels)
+
+def timed(name):
+    """Decorator that records every call of the function as a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(name, value=1):
+    """Add value to a counter in the current trace and the process registry"""
+    registry.increment(name, value)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.increment(name, value)
+
+def set_gauge(name, value):
+    """Set a process-wide gauge, e.g. a queue depth"""
+    registry.set_gauge(name, value)
+
+def export_json(*traces):
+    """Process metrics plus the given traces as a JSON string"""
+    return json.dumps({
+        'process': registry.to_dict(),
+        'traces': [trace.to_dict() for trace in traces if trace is not None],
+    }, indent=2)
+
+def _metric_name(name):
+    return 'consumercompass_' + ''.join(c if c.isalnum() else '_' for c in name)
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def export_prometheus():
+    """Process metrics in the Prometheus text exposition format"""
+    data = registry.to_dict()
+    with registry._lock:
+        buckets = {name: list(values) for name, values in registry.span_buckets.items()}
+
+    lines = [
+        '# HELP consumercompass_span_seconds Time spent in instrumented spans.',
+        '# TYPE consumercompass_span_seconds histogram',
+    ]
+    for name, totals in sorted(data['spans'].items()):
+        label = f'span="{_label_value(name)}"'
+        for bound, count in zip(SPAN_BUCKETS, buckets[name]):
+            lines.append(f'consumercompass_span_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'consumercompass_span_seconds_bucket{{{label},le="+Inf"}} {totals["count"]}')
+        lines.append(f'consumercompass_span_seconds_sum{{{label}}} {totals["sum_seconds"]}')
+        lines.append(f'consumercompass_span_seconds_count{{{label}}} {totals["count"]}')
+
+    for name, value in sorted(data['counters'].items()):
+        metric = _metric_name(name) + '_total'
+        lines.append(f'# TYPE {metric} counter')
+        lines.append(f'{metric} {value}')
+
+    for name, value in sorted(data['gauges'].items()):
+        metric = _metric_name(name)
+        lines.append(f'# TYPE {metric} gauge')
+        lines.append(f'{metric} {value}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+import weakref
+
+import metrics
+from data import sort_by_rating, SEARCH_CACHE_TTL
+
+# Unused results kept for sessions that search the same thing again soon
+RESULTS_MAX_IDLE = int(os.environ.get('CONSUMERCOMPASS_RESULTS_MAX_IDLE', '32'))
+
+LABEL_COLUMNS = ['Business Name', 'Address', 'Place ID']
+
+class SearchResults:
+    """One search result, treated as read-only once built
+
+    data is kept in rating order for filter_by_rating, while labels (and the
+    label -> place ID lookup) keep the search ranking order for selection
+    widgets. Filtering returns slices of data, never copies. fetched_at is
+    when the data came from the Places API, which for a snapshot can be well
+    before it was loaded.
+
+    data is in ranking order unless ranking is given, in which case data must
+    already be in rating order (as snapshots are) and ranking holds its row
+    positions in ranking order. data is then used as is, so a memory-mapped
+    snapshot stays mapped instead of being copied by a sort.
+    """
+
+    def __init__(self, data, fetched_at=None, ranking=None):
+        # Only the label columns are put in ranking order, never the whole frame
+        ranked = data if ranking is None or data.empty else data[LABEL_COLUMNS].iloc[ranking]
+        # Map display labels to place IDs, which stay unique across locations
+        self.lookup = {} if data.empty else {
+            f"{name} - {addr}": place_id
+            for name, addr, place_id in zip(ranked['Business Name'], ranked['Address'], ranked['Place ID'])
+        }
+        self.labels = list(self.lookup)
+        self.data = sort_by_rating(data)
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+
+class ResultHandle:
+    """A session's reference to a SearchResults, counted by the registry that issued it
+
+    Releasing is idempotent and also happens when the handle is garbage
+    collected, e.g. when a Streamlit session ends.
+    """
+
+    def __init__(self, results, release=None):
+        self.results = results
+        self._finalizer = weakref.finalize(self, release) if release else None
+
+    @property
+    def data(self):
+        return self.results.data
+
+    @property
+    def labels(self):
+        return self.results.labels
+
+    @property
+    def lookup(self):
+        return self.results.lookup
+
+    def release(self):
+        if self._finalizer is not None:
+            self._finalizer()
+
+class _Entry:
+    def __init__(self, results):
+        self.results = results
+        self.refs = 0
+        self.last_used = time.monotonic()
+
+class ResultRegistry:
+    """Process-wide store of search results shared by every session
+
+    Sessions that run the same (normalized) search hold handles on one
+    SearchResults instead of private copies. Entries stay while any handle
+    is held; up to max_idle unreferenced entries are kept, least recently
+    used first out, and entries fetched more than max_age seconds ago are not
+    handed out again.
+    """
+
+    def __init__(self, max_idle=RESULTS_MAX_IDLE, max_age=SEARCH_CACHE_TTL):
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Handle on the shared results for key, or None if there are none or they are stale"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry.results.fetched_at > self.max_age:
+                return None
+            return self._acquire(entry)
+
+    def share(self, key, data, fetched_at=None, ranking=None):
+        """Handle on the shared results for key, registering data unless they are older
+
+        fetched_at defaults to now, i.e. data was just fetched; ranking is as
+        for SearchResults.
+        """
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.results.fetched_at < fetched_at:
+                # Holders of a replaced entry keep it until they release it
+                entry = self._entries[key] = _Entry(SearchResults(data, fetched_at, ranking))
+                self._evict()
+            return self._acquire(entry)
+
+    def stats(self):
+        """Entry, held entry and handle counts"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'held': sum(1 for entry in self._entries.values() if entry.refs),
+                'handles': sum(entry.refs for entry in self._entries.values()),
+            }
+
+    def _acquire(self, entry):
+        entry.refs += 1
+        entry.last_used = time.monotonic()
+        self._update_gauges()
+        return ResultHandle(entry.results, lambda: self._release(entry))
+
+    def _release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            self._evict()
+            self._update_gauges()
+
+    def _evict(self):
+        idle = sorted(
+            (entry.last_used, key) for key, entry in self._entries.items() if not entry.refs
+        )
+        for _, key in idle[:max(0, len(idle) - self.max_idle)]:
+            del self._entries[key]
+
+    def _update_gauges(self):
+        metrics.set_gauge('results.registry.entries', len(self._entries))
+        metrics.set_gauge('results.registry.handles', sum(entry.refs for entry in self._entries.values()))
+
+def private_results(data):
+    """Handle on results only this session sees, e.g. a search still streaming in"""
+    return ResultHandle(SearchResults(data))
+
+shared_results = ResultRegistry()
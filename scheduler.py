@@ -0,0 +1,193 @@
+import contextvars
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import googlemaps
+import metrics
+
+# Priority classes, most urgent first. Waiting requests are served strictly
+# in this order, so background work only uses capacity foreground work leaves.
+PRIORITY_SEARCH = 0
+PRIORITY_HIGHLIGHTS = 1
+PRIORITY_PREFETCH = 2
+
+# Statuses Google uses when a quota or rate limit is exceeded
+QUOTA_STATUSES = ('OVER_QUERY_LIMIT', 'RESOURCE_EXHAUSTED')
+
+_current_priority = contextvars.ContextVar('places_request_priority', default=PRIORITY_SEARCH)
+_current_clock = contextvars.ContextVar('places_scheduler_clock', default=None)
+
+@contextmanager
+def request_priority(priority):
+    """Run the enclosed Places calls (and threads bound with metrics.bind) at priority
+
+    Nesting can only make requests less urgent, so background work that calls
+    foreground helpers keeps its own priority.
+    """
+    token = _current_priority.set(max(priority, _current_priority.get()))
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+def current_priority():
+    return _current_priority.get()
+
+class SchedulerClock:
+    """Time one task has spent waiting in the scheduler, for tokens or quota backoff
+
+    Deadlines on a task can be extended by this much, so they only count time
+    spent in actual Places calls.
+    """
+
+    def __init__(self):
+        self._waited = 0.0
+        self._since = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def waiting(self):
+        with self._lock:
+            self._since = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._waited += time.monotonic() - self._since
+                self._since = None
+
+    def waited(self):
+        """Seconds waited so far, including a wait still in progress"""
+        with self._lock:
+            in_progress = time.monotonic() - self._since if self._since is not None else 0.0
+            return self._waited + in_progress
+
+def run_with_clock(clock, fn, *args, **kwargs):
+    """Call fn, recording the time its Places calls wait in the scheduler on clock"""
+    token = _current_clock.set(clock)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current_clock.reset(token)
+
+def is_quota_error(e):
+    """True if e means we are sending requests faster than our quota allows"""
+    if isinstance(e, googlemaps.exceptions.ApiError):
+        return e.status in QUOTA_STATUSES
+    if isinstance(e, googlemaps.exceptions.HTTPError):
+        return e.status_code == 429
+    return False
+
+class RequestScheduler:
+    """Process-wide token bucket that admits Places requests by priority
+
+    Tokens refill at rate per second up to burst. A request waits until it is
+    the most urgent one queued and a token is available (rate <= 0 disables
+    the limit). Quota errors empty the bucket, so every caller slows down
+    together, and the request is retried after a jittered exponential backoff.
+    """
+
+    def __init__(self, rate, burst=None, max_retries=8, backoff=0.5, max_backoff=8.0):
+        self.rate = rate
+        self.burst = burst or max(rate, 1)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def queue_depth(self):
+        """Requests currently waiting for a token"""
+        with self._condition:
+            return len(self._waiting)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=None):
+        """Block until a request at priority may be sent"""
+        if self.rate <= 0:
+            return
+        ticket = (current_priority() if priority is None else priority, next(self._sequence))
+        with metrics.span('places.scheduler_wait'), self._condition:
+            heapq.heappush(self._waiting, ticket)
+            metrics.set_gauge('places.scheduler.queue_depth', len(self._waiting))
+            try:
+                while True:
+                    self._refill()
+                    if self._waiting[0] != ticket:
+                        self._condition.wait()
+                    elif self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    else:
+                        self._condition.wait((1 - self._tokens) / self.rate)
+            finally:
+                if self._waiting[0] == ticket:
+                    heapq.heappop(self._waiting)
+                else:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                metrics.set_gauge('places.scheduler.queue_depth', len(self._waiting))
+                self._condition.notify_all()
+
+    def _throttle(self):
+        """Empty the bucket after a quota error so all callers back off"""
+        with self._condition:
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn once admitted, retrying quota errors with jittered backoff
+
+        Time spent waiting here is recorded on the caller's SchedulerClock, if any.
+        """
+        clock = _current_clock.get()
+        for attempt in range(self.max_retries + 1):
+            with clock.waiting() if clock else nullcontext():
+                self.acquire()
+            try:
+                return fn(*args, **kwargs)
+            except (googlemaps.exceptions.ApiError, googlemaps.exceptions.HTTPError) as e:
+                if not is_quota_error(e) or attempt == self.max_retries:
+                    raise
+                metrics.increment('places.scheduler.quota_retries')
+                self._throttle()
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                with clock.waiting() if clock else nullcontext():
+                    time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+class ScheduledClient:
+    """Places client wrapper that sends every call through a RequestScheduler
+
+    Other attributes, such as a fake backend's call counters, are passed
+    through to the wrapped client.
+    """
+
+    def __init__(self, client, scheduler):
+        self.client = client
+        self.scheduler = scheduler
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def places(self, *args, **kwargs):
+        return self.scheduler.call(self.client.places, *args, **kwargs)
+
+    def place(self, *args, **kwargs):
+        return self.scheduler.call(self.client.place, *args, **kwargs)
+
+    def geocode(self, *args, **kwargs):
+        return self.scheduler.call(self.client.geocode, *args, **kwargs)
+
+    def places_photo(self, *args, **kwargs):
+        return self.scheduler.call(self.client.places_photo, *args, **kwargs)
@@ -1,15 +1,65 @@
-import plotly.graph_objects as go
-import plotly.express as px
+import math
+from functools import lru_cache
 import streamlit as st
+from metrics import span
 
-def create_rating_distribution_chart(business_data, business_name):
+# Figures are memoized so reruns from unrelated widgets reuse the same objects
+FIGURE_CACHE_SIZE = 256
+
+# Radar trace colours; the first two are the classic pairwise comparison colours
+RADAR_COLORS = [
+    'rgba(31, 119, 180, 0.7)', 'rgba(255, 127, 14, 0.7)', 'rgba(44, 160, 44, 0.7)',
+    'rgba(214, 39, 40, 0.7)', 'rgba(148, 103, 189, 0.7)', 'rgba(140, 86, 75, 0.7)',
+    'rgba(227, 119, 194, 0.7)', 'rgba(127, 127, 127, 0.7)', 'rgba(188, 189, 34, 0.7)',
+    'rgba(23, 190, 207, 0.7)',
+]
+
+# Beyond this many businesses an overlaid radar is unreadable; use small multiples
+RADAR_OVERLAY_MAX = 6
+
+def create_rating_distribution_chart(business_data, place_id):
     """Create a bar chart showing the rating distribution for a business"""
-    ratings = ['5_star', '4_star', '3_star', '2_star', '1_star']
-    values = business_data[business_data['Business Name'] == business_name][ratings].values[0]
-    
     # Determine if we're on mobile
     screen_width = st.session_state.get('screen_width', 1200)
     is_mobile = screen_width <= 768
+
+    with span('render.rating_chart'):
+        return _rating_distribution_figure(place_id, _rating_values(business_data, place_id), is_mobile)
+
+def warm_figures(business_data, place_ids, is_mobile):
+    """Build the figures a comparison of place_ids would show, ahead of time
+
+    Each business gets its rating chart and the first one is paired with
+    each of the others for the radar chart, matching the default selection.
+    Safe to call from a background thread; it never touches session state.
+    """
+    for place_id in place_ids:
+        _rating_distribution_figure(place_id, _rating_values(business_data, place_id), is_mobile)
+    for place_id in place_ids[1:]:
+        _comparison_radar_figure(_radar_businesses(business_data, place_ids[0], place_id), is_mobile)
+
+def _rating_values(business_data, place_id):
+    """Rating distribution of a business as a hashable tuple"""
+    ratings = ['5_star', '4_star', '3_star', '2_star', '1_star']
+    return tuple(business_data.loc[place_id, ratings].to_numpy(dtype=float).tolist())
+
+def _radar_businesses(business_data, *place_ids):
+    """(place_id, name, values) tuples for the radar chart, from one lookup of all rows"""
+    metrics = ['Average Rating', '5_star', '4_star', '3_star', '2_star', '1_star']
+    rows = business_data.loc[list(place_ids)]
+    values = rows[metrics].to_numpy(dtype=float).tolist()
+    return tuple(
+        (place_id, name, tuple(business_values))
+        for place_id, name, business_values in zip(place_ids, rows['Business Name'], values)
+    )
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _rating_distribution_figure(place_id, values, is_mobile):
+    """Build the rating distribution figure; cached on everything it depends on"""
+    # Plotly is imported on the first chart, not at startup
+    import plotly.graph_objects as go
+
+    ratings = ['5_star', '4_star', '3_star', '2_star', '1_star']
     
     # Create labels that look better on mobile
     display_ratings = ["5★", "4★", "3★", "2★", "1★"] if is_mobile else ratings
@@ -51,13 +101,23 @@ def create_rating_distribution_chart(business_data, business_name):
     
     return fig
 
-def create_comparison_radar_chart(business_data, business1, business2):
+def create_comparison_radar_chart(business_data, place_id1, place_id2):
     """Create a radar chart comparing two businesses"""
-    metrics = ['Average Rating', '5_star', '4_star', '3_star', '2_star', '1_star']
-    
+    businesses = _radar_businesses(business_data, place_id1, place_id2)
+
     # Determine if we're on mobile
     screen_width = st.session_state.get('screen_width', 1200)
     is_mobile = screen_width <= 768
+
+    with span('render.radar_chart'):
+        return _comparison_radar_figure(businesses, is_mobile)
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _comparison_radar_figure(businesses, is_mobile):
+    """Build the radar figure from (place_id, name, values) tuples; cached on its inputs"""
+    import plotly.graph_objects as go
+
+    metrics = ['Average Rating', '5_star', '4_star', '3_star', '2_star', '1_star']
     
     # Create labels that look better on mobile
     display_metrics = ["Avg Rating", "5★", "4★", "3★", "2★", "1★"] if is_mobile else metrics
@@ -65,10 +125,9 @@ def create_comparison_radar_chart(business_data, business1, business2):
     fig = go.Figure()
     
     # Custom colors for better distinction
-    colors = ['rgba(31, 119, 180, 0.7)', 'rgba(255, 127, 14, 0.7)']
-    
-    for i, business in enumerate([business1, business2]):
-        values = business_data[business_data['Business Name'] == business][metrics].values[0]
+    colors = RADAR_COLORS
+
+    for i, (place_id, business, values) in enumerate(businesses):
         # Truncate business name for better display on mobile
         display_name = business if not is_mobile else (business[:15] + '...' if len(business) > 15 else business)
         fig.add_trace(go.Scatterpolar(
@@ -76,8 +135,8 @@ def create_comparison_radar_chart(business_data, business1, business2):
             theta=display_metrics,
             fill='toself',
             name=display_name,
-            fillcolor=colors[i],
-            line=dict(color=colors[i].replace('0.7', '1.0')),
+            fillcolor=colors[i % len(colors)],
+            line=dict(color=colors[i % len(colors)].replace('0.7', '1.0')),
             opacity=0.8
         ))
     
@@ -111,3 +170,67 @@ def create_comparison_radar_chart(business_data, business1, business2):
     )
     
     return fig
+
+def create_multi_comparison_radar_chart(business_data, place_ids):
+    """Create a radar chart comparing several businesses
+
+    Up to RADAR_OVERLAY_MAX businesses share one overlaid radar; more are
+    drawn as a grid of small multiples on the same scale.
+    """
+    businesses = _radar_businesses(business_data, *place_ids)
+
+    # Determine if we're on mobile
+    screen_width = st.session_state.get('screen_width', 1200)
+    is_mobile = screen_width <= 768
+
+    with span('render.radar_chart'):
+        if len(businesses) <= RADAR_OVERLAY_MAX:
+            return _comparison_radar_figure(businesses, is_mobile)
+        return _radar_small_multiples_figure(businesses, is_mobile)
+
+@lru_cache(maxsize=FIGURE_CACHE_SIZE)
+def _radar_small_multiples_figure(businesses, is_mobile):
+    """Build one small radar per business from (place_id, name, values) tuples"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    metrics = ["Avg Rating", "5★", "4★", "3★", "2★", "1★"]
+    columns = 2 if is_mobile else 4
+    rows = math.ceil(len(businesses) / columns)
+    titles = [
+        business if len(business) <= 20 else business[:20] + '...'
+        for _, business, _ in businesses
+    ]
+
+    fig = make_subplots(
+        rows=rows,
+        cols=columns,
+        specs=[[{'type': 'polar'}] * columns for _ in range(rows)],
+        subplot_titles=titles,
+        vertical_spacing=0.25 / rows,
+    )
+    for i, (place_id, business, values) in enumerate(businesses):
+        color = RADAR_COLORS[i % len(RADAR_COLORS)]
+        fig.add_trace(go.Scatterpolar(
+            r=values,
+            theta=metrics,
+            fill='toself',
+            name=business,
+            fillcolor=color,
+            line=dict(color=color.replace('0.7', '1.0')),
+        ), row=i // columns + 1, col=i % columns + 1)
+
+    font_size = 8 if is_mobile else 10
+    fig.update_polars(
+        radialaxis=dict(visible=True, range=[0, 100], tickfont={'size': font_size}),
+        angularaxis=dict(tickfont={'size': font_size}),
+    )
+    fig.update_annotations(font_size=font_size + 2)
+    fig.update_layout(
+        showlegend=False,
+        height=(220 if is_mobile else 260) * rows,
+        autosize=True,
+        margin=dict(l=30, r=30, t=40, b=20),
+    )
+
+    return fig